@@ -1,13 +1,27 @@
+import time
+_import_start = time.perf_counter()
+
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime, timedelta
+from functools import cached_property, partial, wraps
 import numpy as np
-from io import BytesIO
-from utils.data_loader import DataLoader
-from utils.charts import ChartGenerator
-from config.settings import DEPARTMENTS, COLORS
+from utils.data_loader import CacheLease, DataLoader, page_frame, row_order
+from utils.charts import ChartGenerator, palette
+from utils.filters import RowFilter, RowLimit
+from utils.kpi_engine import KPIEngine
+from utils.kpi_history import FREQUENCIES, KPIHistory
+from utils.exports import EXPORT_FORMATS, available_formats, export_bytes
+from utils.report import preload_report
+from utils.sketches import SketchStore
+from utils.tables import style_status_rows
+from utils.profiler import Profiler, profile_stage, profiled
+from utils.startup import mark, prewarm, summary, timed
+from config.settings import CHART_CONFIG, CUBE_CONFIG, DATASETS, DEPARTMENTS, COLORS, LIMIT_CONFIG, STATUSES
+
+# plotly and the Excel writer are imported when the first figure or workbook is built;
+# on reruns the modules are already loaded, so only the first run's import time is kept
+mark('imports', time.perf_counter() - _import_start)
 
 # Page configuration
 st.set_page_config(
@@ -42,12 +56,72 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+def section_rerun(method):
+    """For dashboard sections under st.fragment: when the section reruns on its own, hold the
+       session's cache lease for it and, with profiling on, show the section's rerun profile"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if CacheLease.current() is not None:
+            # part of a full rerun, which holds the lease and runs the profiler
+            return method(self, *args, **kwargs)
+        lease = st.session_state.setdefault('cache_lease', CacheLease())
+        with lease.rerun(scope=(method.__name__,) + args):
+            if not st.session_state.get('profile_enabled'):
+                return method(self, *args, **kwargs)
+            with Profiler(track_memory=st.session_state.get('profile_memory', False)) as profiler:
+                with profile_stage('rerun'):
+                    result = method(self, *args, **kwargs)
+            self.show_section_profile(profiler)
+            return result
+    return wrapper
+
+
 class SolochoicezDashboard:
     def __init__(self):
         self.data_loader = DataLoader()
         self.chart_generator = ChartGenerator()
-        
+        self.kpi_engine = KPIEngine(self.data_loader)
+        self.kpi_history = KPIHistory(self.data_loader)
+        self.sketches = SketchStore(self.data_loader)
+        preload_report(self.kpi_engine)
+
+    @cached_property
+    def cube(self):
+        """Drill-down cube; only the Overview uses it, so it is imported on first use"""
+        from utils.cube import KPICube
+        return KPICube(self.data_loader)
+
+    def cube_base(self, dataset, row_filter):
+        """Base cuboid of a dataset, importing the cube only when called"""
+        return self.cube.base(dataset, row_filter)
+
+    def prewarm_tasks(self):
+        """What every view computes on its first render with the current filters, as background tasks"""
+        row_filter, limit = self.current_filter(), self.current_limit()
+        freq = FREQUENCIES[st.session_state.get('trend_frequency', 'Monthly')]
+        tasks = [partial(palette, self.chart_generator.color_palette)]
+        for dataset in DATASETS:
+            tasks += [
+                partial(self.kpi_engine.compute, dataset, row_filter),
+                partial(self.kpi_history.rollup, dataset, freq, row_filter),
+                partial(self.data_loader.load, dataset, row_filter, CHART_CONFIG['columns'][dataset]),
+                partial(self.data_loader.load, dataset, row_filter, limit=limit),
+                partial(self.data_loader.page, dataset, row_filter, None, True, "", 1, limit.n, limit),
+                partial(self.cube_base, dataset, row_filter),
+                partial(self.sketches.compute, dataset, row_filter),
+            ]
+        return tasks
+
     def run(self):
+        if not st.session_state.get('profile_enabled'):
+            self.render()
+            return
+        with Profiler(track_memory=st.session_state.get('profile_memory', False)) as profiler:
+            with profile_stage('rerun'):
+                self.render()
+        self.show_profile(profiler)
+
+    def render(self):
         st.markdown('<h1 class="main-header"> Solochoicez Pvt. Ltd. - Performance Dashboard</h1>', unsafe_allow_html=True)
         self.create_sidebar()
         
@@ -77,109 +151,251 @@ class SolochoicezDashboard:
         with col2:
             end_date = st.date_input("To", datetime.now())
         st.session_state['date_range'] = (start_date, end_date)
+        st.session_state['date_filter'] = st.sidebar.checkbox("Filter by date range", value=False)
+        st.session_state['trend_frequency'] = st.sidebar.selectbox("Trend granularity", list(FREQUENCIES), index=2)
 
         st.sidebar.markdown("### 📊 Filters")
-        max_rows = st.sidebar.slider("Number of records to display", min_value=10, max_value=300, value=100, step=10)
-        st.session_state['max_rows'] = max_rows
-
-        departments = ['IT Solutions', 'HR & Staffing', 'Business Consulting', 'Data & AI Services']
+        departments = list(DEPARTMENTS)
         selected_departments = st.sidebar.multiselect("Select Departments", departments, default=departments)
         st.session_state['selected_departments'] = selected_departments
+
+        selected_statuses = st.sidebar.multiselect("Select Status", STATUSES, default=[], placeholder="All statuses")
+        st.session_state['selected_statuses'] = selected_statuses
         
         if st.sidebar.button("🔄 Refresh Data"):
             st.rerun()
 
-    def filter_dataset(self, df):
-        # Guard: if df is None or empty return empty df
-        if df is None:
+        st.sidebar.markdown("### ⏱️ Profiling")
+        st.sidebar.checkbox("Profile reruns", value=False, key='profile_enabled')
+        st.sidebar.checkbox("Track allocations (slower)", value=False, key='profile_memory',
+                            disabled=not st.session_state.get('profile_enabled'))
+
+    def show_profile(self, profiler):
+        """Sidebar breakdown of the rerun just profiled, with its trace for chrome://tracing or Perfetto"""
+        breakdown = profiler.breakdown()
+        total = breakdown.loc[breakdown['stage'] == 'rerun', 'total_ms'].sum()
+        with st.sidebar.expander(f"Rerun profile: {total:.0f} ms", expanded=True):
+            self.profile_table(breakdown)
+            stats = self.data_loader.cache_stats()
+            st.caption(f"Dataset cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} entries, "
+                       f"{stats['pinned']} held by open sessions")
+            st.caption(f"Process startup: {summary()}")
+            st.download_button("⬇️ Trace (JSON)", profiler.trace_json(), file_name="rerun_trace.json",
+                               mime="application/json", key="download_trace", on_click="ignore")
+            if st.button("Memory report", key="memory_report"):
+                report = self.data_loader.memory_report()
+                st.dataframe(report, hide_index=True, use_container_width=True)
+                st.caption(f"Compact frames save {report['saved_bytes'].sum() / 2 ** 20:.2f} MiB per process")
+
+    def show_section_profile(self, profiler):
+        """Breakdown of a section's own rerun, shown under the section (fragments can't write to the sidebar)"""
+        breakdown = profiler.breakdown()
+        total = breakdown.loc[breakdown['stage'] == 'rerun', 'total_ms'].sum()
+        with st.expander(f"Section rerun profile: {total:.0f} ms"):
+            self.profile_table(breakdown)
+
+    def profile_table(self, breakdown):
+        st.dataframe(breakdown, hide_index=True, use_container_width=True, column_config={
+            'total_ms': st.column_config.NumberColumn("ms", format="%.1f"),
+            'rows': st.column_config.NumberColumn("rows", format="%d"),
+            'alloc_mib': st.column_config.NumberColumn("alloc MiB", format="%.2f"),
+        })
+
+    def current_filter(self):
+        """RowFilter built from the sidebar selections"""
+        date_range = st.session_state.get('date_range') if st.session_state.get('date_filter') else None
+        return RowFilter(
+            values={
+                'department': st.session_state.get('selected_departments'),
+                'status': st.session_state.get('selected_statuses'),
+            },
+            date_range=date_range,
+        )
+
+    def current_limit(self):
+        """RowLimit from the detail table's record count and selection mode"""
+        return RowLimit(st.session_state.get('max_rows', 100), st.session_state.get('limit_mode'))
+
+    def limit_controls(self, key):
+        """Record count and selection mode of the detail table `key`; only its section reruns when they change"""
+        col1, col2 = st.columns(2)
+        with col1:
+            st.slider("Number of records to display", min_value=10, max_value=300, value=100, step=10, key='max_rows')
+        with col2:
+            modes = LIMIT_CONFIG['modes']
+            st.selectbox("Records shown", list(modes), format_func=modes.get, key='limit_mode',
+                         on_change=self.first_page, args=(key,))
+
+    @profiled()
+    def filter_dataset(self, dataset, limited=True, columns=None):
+        """Load a dataset with the sidebar filters, and unless `limited` is False the row limit,
+           applied by the storage backend; `columns` keeps only the columns a caller uses"""
+        try:
+            limit = self.current_limit() if limited else None
+            return self.data_loader.load(dataset, row_filter=self.current_filter(), columns=columns, limit=limit)
+        except FileNotFoundError:
+            print("File not found. Please check the file path and try again.")
             return pd.DataFrame()
-        if 'department' in df.columns and st.session_state.get('selected_departments'):
-            df = df[df['department'].isin(st.session_state['selected_departments'])]
-        max_rows = st.session_state.get('max_rows', len(df))
-        if len(df) > max_rows:
-            df = df.sample(max_rows, random_state=42)
-        return df
+
+    def chart_data(self, dataset):
+        """Every filtered record, but only the columns the dataset's charts plot (CHART_CONFIG['columns']);
+           ChartGenerator aggregates, bins or caps rows beyond CHART_CONFIG['max_points']"""
+        return self.filter_dataset(dataset, limited=False, columns=CHART_CONFIG['columns'][dataset])
+
+    def dataset_kpis(self, dataset):
+        """KPI metrics and distributions of the filtered dataset (see utils/kpi_engine.py)"""
+        try:
+            return self.kpi_engine.compute(dataset, self.current_filter())
+        except FileNotFoundError:
+            return {'metrics': {}, 'distributions': {}}
+
+    def dataset_sketches(self, dataset):
+        """Approximate quantiles and distinct counts of the filtered dataset (see utils/sketches.py)"""
+        try:
+            return self.sketches.compute(dataset, self.current_filter())['metrics']
+        except FileNotFoundError:
+            return {}
+
+    def sketch_row(self, dataset, metrics):
+        """Row of approximate KPIs: (label, metric name or names, format) per column"""
+        values = self.dataset_sketches(dataset)
+        for column, (label, names, fmt) in zip(st.columns(len(metrics)), metrics):
+            args = [values.get(name) for name in ((names,) if isinstance(names, str) else names)]
+            text = fmt.format(*args) if all(v is not None and pd.notna(v) for v in args) else "–"
+            column.metric(label, text, help="Approximate, from mergeable sketches of the filtered records")
+
+    def kpi_trend(self, dataset, metric):
+        """History of a KPI at the sidebar granularity, as of the end of each period.
+
+        Passing a list of datasets adds their (count or sum) KPI together."""
+        freq = FREQUENCIES[st.session_state.get('trend_frequency', 'Monthly')]
+        try:
+            if isinstance(dataset, str):
+                trend = self.kpi_history.series(dataset, metric, freq, row_filter=self.current_filter())
+            else:
+                trend = self.kpi_history.total_series(dataset, metric, freq, row_filter=self.current_filter())
+        except FileNotFoundError:
+            return []
+        return trend.fillna(0).tolist()
 
     # ---------------- NEW UTILITY FUNCTIONS ----------------
-    def _to_excel_bytes(self, df: pd.DataFrame) -> bytes:
-        """Return Excel file as bytes for download."""
-        output = BytesIO()
-        # Use ExcelWriter with xlsxwriter or openpyxl (pandas will choose available engine)
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            df.to_excel(writer, index=False, sheet_name='Sheet1')
-            return output.getvalue()
-
-    def download_buttons(self, df, filename):
-        """Show CSV and Excel download buttons for a dataframe."""
+    @profiled()
+    def download_buttons(self, df, filename, version=None):
+        """Show CSV, Excel and Parquet download buttons for a dataframe.
+           Files are generated only when a button is clicked and cached per `version`
+           (dataset versions plus filter state)."""
         if df is None or df.empty:
             st.info("No data to download.")
             return
-        csv = df.to_csv(index=False).encode('utf-8')
-        st.download_button("📥 Download CSV", csv, file_name=f"{filename}.csv", mime="text/csv")
+        for fmt in available_formats(df):
+            spec = EXPORT_FORMATS[fmt]
+            st.download_button(
+                spec['label'],
+                lambda fmt=fmt: export_bytes(df, fmt, filename, version),
+                file_name=f"{filename}.{fmt}",
+                mime=spec['mime'],
+                key=f"download_{filename}_{fmt}",
+                on_click="ignore",
+            )
+
+    def export_version(self, *datasets):
+        """Identifies the data behind a download: source versions, sidebar filters and row limit"""
         try:
-            excel_bytes = self._to_excel_bytes(df)
-            st.download_button("📥 Download Excel", excel_bytes, file_name=f"{filename}.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-        except Exception:
-            # Fallback: offer CSV only if excel writer missing
-            pass
+            versions = tuple(self.data_loader.source_version(name) for name in datasets)
+        except FileNotFoundError:
+            return None
+        return versions + (self.current_filter().key(), self.current_limit().key())
 
+    @profiled()
     def styled_dataframe(self, df):
-        """Return a pandas Styler with conditional row background based on 'status' column.
-           If 'status' not present or df empty, returns df as-is (DataFrame)."""
-        if df is None or df.empty:
-            return df  # empty DataFrame
-        if 'status' in df.columns:
-            def highlight_row(row):
-                color_map = {
-                    "On Hold": "#ffe6e6",
-                    "Planning": "#fff4e6",
-                    "Completed": "#e6ffe6",
-                    "Active": "#e6f0ff"
-                }
-                bg = color_map.get(row["status"], "white")
-                return [f'background-color: {bg}' for _ in row]
+        """Return a pandas Styler with conditional row background based on 'status' column
+           (see utils/tables.py); pass only the rows that will be shown."""
+        return style_status_rows(df)
+
+    def first_page(self, key):
+        """Widget callback: show the first page of a paginated table after its search or sort changed"""
+        st.session_state[f"{key}_page"] = 1
+
+    @profiled()
+    def paginated_table(self, key, dataset=None, df=None):
+        """Detail table that sends one page of rows at a time.
+           Sorting and search run server-side over the filtered `dataset`, or over `df` when given;
+           the page size is the section's 'Number of records to display'. Unsorted, a dataset's rows
+           follow its 'Records shown' mode, so the first page holds the records the mode picks."""
+        page_size = st.session_state.get('max_rows', 100)
+        col1, col2, col3 = st.columns([3, 2, 1])
+        with col1:
+            search = st.text_input("Search", key=f"{key}_search", placeholder="Search text columns",
+                                   on_change=self.first_page, args=(key,))
+        sort_slot = col2.empty()
+        with col3:
+            ascending = st.toggle("Ascending", value=True, key=f"{key}_ascending", on_change=self.first_page, args=(key,))
+        sort_by = st.session_state.get(f"{key}_sort", "(none)")
+        sort_by = None if sort_by == "(none)" else sort_by
+        page = st.session_state.get(f"{key}_page", 1)
+
+        def fetch(page):
+            if df is not None:
+                positions = row_order(df, sort_by, ascending, search)
+                return page_frame(df, positions, page, page_size), len(positions)
             try:
-                sty = df.style.apply(highlight_row, axis=1)
-                return sty
-            except Exception:
-                # If styler fails for any reason, return raw df
-                return df
-        return df
+                return self.data_loader.page(dataset, self.current_filter(), sort_by, ascending, search, page, page_size,
+                                             self.current_limit())
+            except FileNotFoundError:
+                return pd.DataFrame(), 0
+
+        rows, total = fetch(page)
+        pages = max(1, -(-total // page_size))
+        if page > pages:
+            page = pages
+            rows, total = fetch(page)
+        st.session_state[f"{key}_page"] = page
+
+        sort_slot.selectbox("Sort by", ["(none)"] + list(rows.columns), key=f"{key}_sort",
+                            on_change=self.first_page, args=(key,))
+        st.dataframe(self.styled_dataframe(rows), use_container_width=True)
+        col1, col2 = st.columns([1, 3])
+        with col1:
+            st.number_input("Page", min_value=1, max_value=pages, step=1, key=f"{key}_page")
+        with col2:
+            first = (page - 1) * page_size + 1 if total else 0
+            st.caption(f"Rows {first:,}–{min(page * page_size, total):,} of {total:,}")
 
     def mini_kpi_chart(self, values, title):
         """Small trend chart below KPI. Accepts iterable of numeric values."""
         # Ensure there is at least one numeric point
         if not values:
             return
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(y=list(values), mode='lines+markers', line=dict(color="#1f77b4"), marker=dict(size=6)))
-        fig.update_layout(
-            height=100,
-            margin=dict(l=10, r=10, t=20, b=10),
-            xaxis=dict(visible=False),
-            yaxis=dict(visible=False),
-            title=dict(text=title, x=0.01, xanchor='left', yanchor='top', font=dict(size=10))
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(self.chart_generator.sparkline(values, title), use_container_width=True)
     # --------------------------------------------------------
 
+    # Views are split into sections that Streamlit re-executes on their own (st.fragment):
+    # a section's widgets rerun only that section, while the sidebar filters every section
+    # depends on rerun the whole view.
+    @profiled()
     def show_overview(self):
         st.markdown("## 📊 Company Overview")
-        it_data = self.filter_dataset(self.data_loader.load_it_solutions_data())
-        hr_data = self.filter_dataset(self.data_loader.load_hr_staffing_data())
-        consulting_data = self.filter_dataset(self.data_loader.load_consulting_data())
-        ai_data = self.filter_dataset(self.data_loader.load_ai_services_data())
-        
+        self.overview_kpi_row()
+        st.markdown("---")
+        self.overview_chart_row()
+        self.drill_down()
+        self.overview_details()
+
+    @st.fragment
+    @section_rerun
+    @profiled()
+    def overview_kpi_row(self):
+        """Headline KPIs. Depends on: sidebar filters, trend granularity"""
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            total_projects = (0 if it_data is None else len(it_data)) + (0 if consulting_data is None else len(consulting_data)) + (0 if ai_data is None else len(ai_data))
+            total_projects = sum(int(self.dataset_kpis(name)['metrics'].get('rows', 0)) for name in ['it_solutions', 'business_consulting', 'data_ai_services'])
             st.metric("Total Active Projects", total_projects, delta=5)
             # sample trend: last 3 months + current
-            self.mini_kpi_chart([max(0, total_projects-3), max(0, total_projects-1), total_projects], "Projects Trend")
+            self.mini_kpi_chart(self.kpi_trend(['it_solutions', 'business_consulting', 'data_ai_services'], 'rows'), "Projects Trend")
         with col2:
-            total_employees = 0 if hr_data is None else len(hr_data)
+            total_employees = int(self.dataset_kpis('hr_staffing')['metrics'].get('rows', 0))
             st.metric("Total Employees", total_employees, delta=12)
-            self.mini_kpi_chart([max(0, total_employees-10), max(0, total_employees-5), total_employees], "Employees Trend")
+            self.mini_kpi_chart(self.kpi_trend('hr_staffing', 'rows'), "Employees Trend")
         with col3:
             total_revenue = 2500000  # Sample data (kept as-is)
             st.metric("Monthly Revenue (PKR)", f"{total_revenue:,}", delta="15%")
@@ -190,267 +406,388 @@ class SolochoicezDashboard:
             st.metric("Client Satisfaction", f"{client_satisfaction}%", delta="2.1%")
             self.mini_kpi_chart([90, 92, client_satisfaction], "Satisfaction Trend")
 
-        st.markdown("---")
+    @st.fragment
+    @section_rerun
+    @profiled()
+    def overview_chart_row(self):
+        """Department value and project status charts. Depends on: sidebar filters"""
         col1, col2 = st.columns(2)
+        departments = self.cube_departments()
         with col1:
-            dept_revenue = {'IT Solutions': 1200000, 'HR & Staffing': 400000, 'Business Consulting': 600000, 'Data & AI Services': 300000}
-            fig_revenue = px.pie(values=list(dept_revenue.values()), names=list(dept_revenue.keys()), title="Revenue Distribution by Department", color_discrete_sequence=px.colors.qualitative.Set3)
+            fig_revenue = self.chart_generator.distribution_pie(self.department_values(departments), "Value by Department and Measure (PKR)", colors="Set3")
             st.plotly_chart(fig_revenue, use_container_width=True)
         with col2:
-            project_status = {'Completed': 45, 'In Progress': 32, 'Planning': 18, 'On Hold': 5}
-            fig_status = px.bar(x=list(project_status.keys()), y=list(project_status.values()), title="Project Status Overview", color=list(project_status.keys()), color_discrete_sequence=px.colors.qualitative.Pastel)
+            project_datasets = ['it_solutions', 'business_consulting', 'data_ai_services']
+            project_status = self.cube.query(['status'], where={'department': departments}, row_filter=self.current_filter(), datasets=project_datasets)
+            project_status = project_status[project_status['status'] != 'Unknown'].set_index('status')['records']
+            fig_status = self.chart_generator.distribution_bar(project_status, "Project Status Overview", color_by_value=False, colors="Pastel")
             st.plotly_chart(fig_status, use_container_width=True)
 
+    @st.fragment
+    @section_rerun
+    @profiled()
+    def overview_details(self):
+        """Combined records of every department. Depends on: sidebar filters, record count and mode"""
         # Provide overview-level raw data downloads (concatenate datasets if present)
         st.markdown("### 🔽 Download Overview Data")
+        self.limit_controls("overview_data")
+        datasets = ['it_solutions', 'hr_staffing', 'business_consulting', 'data_ai_services']
+        frames, timings = self.data_loader.load_many(datasets, row_filter=self.current_filter(), limit=self.current_limit())
+        st.session_state['load_timings'] = timings
+        slowest = max(timings, key=timings.get)
+        st.caption(f"Loaded {len(datasets)} datasets concurrently; slowest {slowest} took {timings[slowest] * 1000:.0f} ms")
         combined_frames = []
-        for df in [it_data, hr_data, consulting_data, ai_data]:
+        for name in datasets:
+            df = frames[name]
             if isinstance(df, pd.DataFrame) and not df.empty:
-                combined_frames.append(df.assign(source_df=df.__class__.__name__))
+                combined_frames.append(df.assign(source_df=name))
         if combined_frames:
             overview_df = pd.concat(combined_frames, ignore_index=True, sort=False)
-            self.download_buttons(overview_df, "overview_data")
-            st.dataframe(self.styled_dataframe(overview_df), use_container_width=True)
+            self.download_buttons(overview_df, "overview_data", self.export_version(*datasets))
+            self.paginated_table("overview_data", df=overview_df)
         else:
             st.info("No data available in overview to display or download.")
 
+    def department_values(self, departments):
+        """PKR value per department with one slice per dataset measure (e.g. IT budgets, staff salaries),
+           so budgets, salaries, project values and savings are never added together"""
+        slices = []
+        for name, dims in CUBE_CONFIG['datasets'].items():
+            values = self.cube.query(['department'], where={'department': departments}, row_filter=self.current_filter(), datasets=[name])
+            slices.append(pd.Series(values['value'].to_numpy(), index=values['department'] + f" · {dims['label']}"))
+        values = pd.concat(slices)
+        return values[values > 0]
+
+    def cube_departments(self):
+        """Departments selected in the sidebar, all of them when none are"""
+        return st.session_state.get('selected_departments') or list(DEPARTMENTS)
+
+    @st.fragment
+    @section_rerun
+    @profiled()
+    def drill_down(self):
+        """Drill from departments down to statuses, categories and months, answered from the KPI cube.
+           Depends on: sidebar filters, drill-down selections"""
+        st.markdown("### 🔎 Drill-down")
+        labels = {'department': "Department", 'status': "Status", 'category': "Category", 'month': "Month"}
+        measure = st.radio("Measure", ['records', 'value'], horizontal=True, key="drill_measure",
+                           format_func=lambda m: "Records" if m == 'records' else "Value (PKR)")
+        datasets = None
+        if measure == 'value':
+            # each dataset values its records differently, so values are drilled one dataset at a time
+            source = st.selectbox("Value of", list(CUBE_CONFIG['datasets']), key="drill_value_source",
+                                  format_func=lambda name: CUBE_CONFIG['datasets'][name]['label'])
+            datasets = [source]
+        path = {'department': self.cube_departments()}
+        levels = CUBE_CONFIG['levels']
+        columns = st.columns(len(levels) - 1)
+        depth = 0
+        for column, level in zip(columns, levels[:-1]):
+            options = self.cube.query([level], where=path, row_filter=self.current_filter(), datasets=datasets)[level].tolist()
+            with column:
+                choice = st.selectbox(labels[level], ["All"] + options, key=f"drill_{level}")
+            if choice == "All":
+                break
+            path[level] = choice
+            depth += 1
+        level = levels[depth]
+        result = self.cube.query([level], where=path, row_filter=self.current_filter(), datasets=datasets)
+        trail = " › ".join(str(path[l]) for l in levels[:depth]) or "All departments"
+        if datasets:
+            trail = f"{CUBE_CONFIG['datasets'][datasets[0]]['label']}, {trail}"
+        title = f"{trail}: {labels[level].lower()} breakdown"
+        if level == 'month':
+            result = result.assign(month=result['month'].dt.to_timestamp())
+            fig = self.chart_generator.category_bar(result, 'month', measure, title, chart_id="drill_down")
+        else:
+            fig = self.chart_generator.distribution_bar(result.set_index(level)[measure], title, chart_id="drill_down")
+        st.plotly_chart(fig, use_container_width=True)
+
+    def has_records(self, dataset):
+        """Whether any record of the dataset passes the sidebar filters (from its cached KPIs)"""
+        return bool(self.dataset_kpis(dataset)['metrics'].get('rows'))
+
+    @st.fragment
+    @section_rerun
+    @profiled()
+    def detail_table(self, dataset, heading):
+        """Download buttons and paged table of a dataset. Depends on: sidebar filters, record count and mode"""
+        st.markdown(heading)
+        self.limit_controls(dataset)
+        data = self.filter_dataset(dataset)
+        self.download_buttons(data, dataset, self.export_version(dataset))
+        self.paginated_table(dataset, dataset=dataset)
+
+    @profiled()
     def show_it_solutions(self):
         st.markdown('<div class="department-header">💻 Information Technology</div>', unsafe_allow_html=True)
-        data = self.filter_dataset(self.data_loader.load_it_solutions_data() )
 
         # Safeguards for missing columns / empty data
-        if data is None or data.empty:
+        if not self.has_records('it_solutions'):
             st.info("No IT data available.")
             return
 
+        self.it_kpi_row()
+        self.it_chart_row()
+        self.detail_table('it_solutions', "### 📋 Project Details")
+
+    @st.fragment
+    @section_rerun
+    @profiled()
+    def it_kpi_row(self):
+        """Depends on: sidebar filters, trend granularity"""
+        metrics = self.dataset_kpis('it_solutions')['metrics']
+
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            active_projects = len(data[data['status'] == 'Active']) if 'status' in data.columns else 0
+            active_projects = int(metrics.get('active', 0))
             st.metric("Active Projects", active_projects)
-            self.mini_kpi_chart([max(0, active_projects-2), max(0, active_projects-1), active_projects], "Active Projects Trend")
+            self.mini_kpi_chart(self.kpi_trend('it_solutions', 'active'), "Active Projects Trend")
         with col2:
-            completed_projects = len(data[data['status'] == 'Completed']) if 'status' in data.columns else 0
+            completed_projects = int(metrics.get('completed', 0))
             st.metric("Completed Projects", completed_projects)
-            self.mini_kpi_chart([max(0, completed_projects-3), max(0, completed_projects-1), completed_projects], "Completed Trend")
+            self.mini_kpi_chart(self.kpi_trend('it_solutions', 'completed'), "Completed Trend")
         with col3:
-            try:
-                avg_completion = data['completion_percentage'].mean() if 'completion_percentage' in data.columns else 0
-            except Exception:
-                avg_completion = 0
+            avg_completion = metrics.get('avg_completion', 0)
             st.metric("Avg Completion", f"{avg_completion:.1f}%")
-            self.mini_kpi_chart([max(0, avg_completion-5), max(0, avg_completion-2), avg_completion], "Avg Completion Trend")
+            self.mini_kpi_chart(self.kpi_trend('it_solutions', 'avg_completion'), "Avg Completion Trend")
         with col4:
-            try:
-                total_budget = data['budget'].sum() if 'budget' in data.columns else 0
-            except Exception:
-                total_budget = 0
+            total_budget = metrics.get('total_budget', 0)
             st.metric("Total Budget", f"PKR{total_budget:,.0f}")
-            self.mini_kpi_chart([max(0, total_budget*0.9), total_budget, total_budget], "Budget Trend")
+            self.mini_kpi_chart(self.kpi_trend('it_solutions', 'total_budget'), "Budget Trend")
+        self.sketch_row('it_solutions', [
+            ("Distinct Clients", 'distinct_clients', "{:,}"),
+            ("Median Budget", 'median_budget', "PKR{:,.0f}"),
+            ("P90 Budget", 'p90_budget', "PKR{:,.0f}"),
+            ("Median Completion", 'median_completion', "{:.0f}%"),
+        ])
+
+    @st.fragment
+    @section_rerun
+    @profiled()
+    def it_chart_row(self):
+        """Depends on: sidebar filters"""
+        data = self.chart_data('it_solutions')
+        kpis = self.dataset_kpis('it_solutions')
 
         col1, col2 = st.columns(2)
         with col1:
-            fig_progress = px.bar(data, x='project_name', y='completion_percentage', title="Project Completion Progress", color='completion_percentage', color_continuous_scale='Viridis') if 'project_name' in data.columns and 'completion_percentage' in data.columns else None
+            fig_progress = self.chart_generator.category_bar(data, 'project_name', 'completion_percentage', "Project Completion Progress") if 'project_name' in data.columns and 'completion_percentage' in data.columns else None
             if fig_progress:
-                fig_progress.update_layout(xaxis=dict(tickangle=45))
                 st.plotly_chart(fig_progress, use_container_width=True)
             else:
                 st.info("Not enough columns to plot 'Project Completion Progress'.")
         with col2:
             if 'technology' in data.columns:
-                tech_counts = data['technology'].value_counts()
-                fig_tech = px.pie(values=tech_counts.values, names=tech_counts.index, title="Technology Stack Distribution")
+                tech_counts = kpis['distributions']['technology']
+                fig_tech = self.chart_generator.distribution_pie(tech_counts, "Technology Stack Distribution")
                 st.plotly_chart(fig_tech, use_container_width=True)
             else:
                 st.info("No 'technology' column available for Technology Stack Distribution.")
 
-        st.markdown("### 📋 Project Details")
-        self.download_buttons(data, "it_solutions")
-        st.dataframe(self.styled_dataframe(data), use_container_width=True)
-
 
+    @profiled()
     def show_hr_staffing(self):
         st.markdown('<div class="department-header">👥 HR Solutions & Services</div>', unsafe_allow_html=True)
-        
-        data = self.filter_dataset(self.data_loader.load_hr_staffing_data())
 
-        if data is None or data.empty:
+        if not self.has_records('hr_staffing'):
             st.info("No HR data available.")
             return
 
+        self.hr_kpi_row()
+        self.hr_chart_row()
+        self.detail_table('hr_staffing', "### 👤 Employee Details")
+
+    @st.fragment
+    @section_rerun
+    @profiled()
+    def hr_kpi_row(self):
+        """Depends on: sidebar filters, trend granularity"""
+        metrics = self.dataset_kpis('hr_staffing')['metrics']
+
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            st.metric("Total Employees", len(data))
-            self.mini_kpi_chart([max(0, len(data)-10), max(0, len(data)-5), len(data)], "Employees Trend")
+            total_employees = int(metrics.get('rows', 0))
+            st.metric("Total Employees", total_employees)
+            self.mini_kpi_chart(self.kpi_trend('hr_staffing', 'rows'), "Employees Trend")
         with col2:
-            try:
-                avg_perf = data['performance_score'].mean() if 'performance_score' in data.columns else 0
-            except Exception:
-                avg_perf = 0
+            avg_perf = metrics.get('avg_performance', 0)
             st.metric("Avg Performance", f"{avg_perf:.1f}/10")
-            self.mini_kpi_chart([max(0, avg_perf-1), avg_perf, avg_perf], "Performance Trend")
+            self.mini_kpi_chart(self.kpi_trend('hr_staffing', 'avg_performance'), "Performance Trend")
         with col3:
-            active_employees = len(data[data['status'] == 'Active']) if 'status' in data.columns else 0
+            active_employees = int(metrics.get('active', 0))
             st.metric("Active Employees", active_employees)
-            self.mini_kpi_chart([max(0, active_employees-2), active_employees, active_employees], "Active Employees Trend")
+            self.mini_kpi_chart(self.kpi_trend('hr_staffing', 'active'), "Active Employees Trend")
         with col4:
-            try:
-                avg_salary = data['salary'].mean() if 'salary' in data.columns else 0
-            except Exception:
-                avg_salary = 0
+            avg_salary = metrics.get('avg_salary', 0)
             st.metric("Avg Salary", f"PKR{avg_salary:,.0f}")
-            self.mini_kpi_chart([max(0, avg_salary*0.95), avg_salary, avg_salary], "Salary Trend")
+            self.mini_kpi_chart(self.kpi_trend('hr_staffing', 'avg_salary'), "Salary Trend")
+        self.sketch_row('hr_staffing', [
+            ("Median Salary", 'median_salary', "PKR{:,.0f}"),
+            ("P90 Salary", 'p90_salary', "PKR{:,.0f}"),
+            ("Median Performance", 'median_performance', "{:.1f}/10"),
+            ("Performance P10–P90", ('p10_performance', 'p90_performance'), "{:.1f}–{:.1f}"),
+        ])
+
+    @st.fragment
+    @section_rerun
+    @profiled()
+    def hr_chart_row(self):
+        """Depends on: sidebar filters"""
+        data = self.chart_data('hr_staffing')
+        kpis = self.dataset_kpis('hr_staffing')
 
         col1, col2 = st.columns(2)
         with col1:
             if 'department' in data.columns:
-                dept_counts = data['department'].value_counts()
-                fig_dept = px.bar(
-                    x=dept_counts.index, y=dept_counts.values,
-                    title="Employee Distribution by Department",
-                    color=dept_counts.values,
-                    color_continuous_scale='Blues'
-                )
+                dept_counts = kpis['distributions']['department']
+                fig_dept = self.chart_generator.distribution_bar(dept_counts, "Employee Distribution by Department", color_scale='Blues')
                 st.plotly_chart(fig_dept, use_container_width=True)
             else:
                 st.info("No 'department' column available for Employee Distribution.")
         with col2:
             if 'performance_score' in data.columns and 'salary' in data.columns:
-                if 'experience_years' in data.columns:
-                    fig_perf = px.scatter(
-                        data, x='performance_score', y='salary',
-                        title="Performance vs Salary Analysis",
-                        color='department' if 'department' in data.columns else None,
-                        size='experience_years'
-                    )
-                else:
-                    fig_perf = px.scatter(
-                        data, x='performance_score', y='salary',
-                        title="Performance vs Salary Analysis",
-                        color='department' if 'department' in data.columns else None
-                    )
+                fig_perf = self.chart_generator.scatter(
+                    data, 'performance_score', 'salary', "Performance vs Salary Analysis",
+                    color='department' if 'department' in data.columns else None,
+                    size='experience_years' if 'experience_years' in data.columns else None
+                )
                 st.plotly_chart(fig_perf, use_container_width=True)
             else:
                 st.info("Not enough columns to plot Performance vs Salary Analysis.")
 
-        st.markdown("### 👤 Employee Details")
-        self.download_buttons(data, "hr_staffing")
-        st.dataframe(self.styled_dataframe(data), use_container_width=True)
-
+    @profiled()
     def show_business_consulting(self):
         st.markdown('<div class="department-header">📈 Business Consulting</div>', unsafe_allow_html=True)
-        
-        data = self.filter_dataset(self.data_loader.load_consulting_data())
 
-        if data is None or data.empty:
+        if not self.has_records('business_consulting'):
             st.info("No Consulting data available.")
             return
 
+        self.consulting_kpi_row()
+        self.consulting_chart_row()
+        self.detail_table('business_consulting', "### 📊 Consulting Projects")
+
+    @st.fragment
+    @section_rerun
+    @profiled()
+    def consulting_kpi_row(self):
+        """Depends on: sidebar filters, trend granularity"""
+        metrics = self.dataset_kpis('business_consulting')['metrics']
+
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            active_cons = len(data[data['status'] == 'Active']) if 'status' in data.columns else 0
+            active_cons = int(metrics.get('active', 0))
             st.metric("Active Consultations", active_cons)
-            self.mini_kpi_chart([max(0, active_cons-2), active_cons, active_cons], "Active Consultations Trend")
+            self.mini_kpi_chart(self.kpi_trend('business_consulting', 'active'), "Active Consultations Trend")
         with col2:
-            try:
-                avg_duration = data['duration_months'].mean() if 'duration_months' in data.columns else 0
-            except Exception:
-                avg_duration = 0
+            avg_duration = metrics.get('avg_duration', 0)
             st.metric("Avg Duration", f"{avg_duration:.1f} months")
-            self.mini_kpi_chart([max(0, avg_duration-2), avg_duration, avg_duration], "Duration Trend")
+            self.mini_kpi_chart(self.kpi_trend('business_consulting', 'avg_duration'), "Duration Trend")
         with col3:
-            try:
-                total_value = data['project_value'].sum() if 'project_value' in data.columns else 0
-            except Exception:
-                total_value = 0
+            total_value = metrics.get('total_value', 0)
             st.metric("Total Value", f"PKR{total_value:,.0f}")
-            self.mini_kpi_chart([max(0, total_value*0.9), total_value, total_value], "Project Value Trend")
+            self.mini_kpi_chart(self.kpi_trend('business_consulting', 'total_value'), "Project Value Trend")
         with col4:
-            try:
-                client_sat = data['client_satisfaction'].mean() if 'client_satisfaction' in data.columns else 0
-            except Exception:
-                client_sat = 0
+            client_sat = metrics.get('avg_satisfaction', 0)
             st.metric("Client Satisfaction", f"{client_sat:.1f}/10")
-            self.mini_kpi_chart([max(0, client_sat-1), client_sat, client_sat], "Client Satisfaction Trend")
+            self.mini_kpi_chart(self.kpi_trend('business_consulting', 'avg_satisfaction'), "Client Satisfaction Trend")
+        self.sketch_row('business_consulting', [
+            ("Distinct Clients", 'distinct_clients', "{:,}"),
+            ("Median Project Value", 'median_value', "PKR{:,.0f}"),
+            ("P90 Project Value", 'p90_value', "PKR{:,.0f}"),
+            ("Median Satisfaction", 'median_satisfaction', "{:.1f}/10"),
+        ])
+
+    @st.fragment
+    @section_rerun
+    @profiled()
+    def consulting_chart_row(self):
+        """Depends on: sidebar filters"""
+        data = self.chart_data('business_consulting')
+        kpis = self.dataset_kpis('business_consulting')
 
         col1, col2 = st.columns(2)
         with col1:
             if 'consulting_area' in data.columns:
-                area_counts = data['consulting_area'].value_counts()
-                fig_area = px.pie(
-                    values=area_counts.values,
-                    names=area_counts.index,
-                    title="Consulting Areas Distribution"
-                )
+                area_counts = kpis['distributions']['consulting_area']
+                fig_area = self.chart_generator.distribution_pie(area_counts, "Consulting Areas Distribution")
                 st.plotly_chart(fig_area, use_container_width=True)
             else:
                 st.info("No 'consulting_area' column available for Consulting Areas Distribution.")
         with col2:
             if all(c in data.columns for c in ['start_date', 'end_date', 'client_name']):
-                fig_timeline = px.timeline(
-                    data, x_start='start_date', x_end='end_date', y='client_name',
-                    title="Project Timeline", color='status' if 'status' in data.columns else None
+                fig_timeline = self.chart_generator.timeline(
+                    data, 'start_date', 'end_date', 'client_name', "Project Timeline",
+                    color='status' if 'status' in data.columns else None
                 )
                 st.plotly_chart(fig_timeline, use_container_width=True)
             else:
                 st.info("Not enough columns to plot Project Timeline (needs start_date, end_date, client_name).")
 
-        st.markdown("### 📊 Consulting Projects")
-        self.download_buttons(data, "business_consulting")
-        st.dataframe(self.styled_dataframe(data), use_container_width=True)
-
+    @profiled()
     def show_data_ai_services(self):
         st.markdown('<div class="department-header">🤖 Data Digitization</div>', unsafe_allow_html=True)
-        
-        data = self.filter_dataset(self.data_loader.load_ai_services_data())
 
-        if data is None or data.empty:
+        if not self.has_records('data_ai_services'):
             st.info("No Data & AI Services data available.")
             return
 
+        self.ai_kpi_row()
+        self.ai_chart_row()
+        self.detail_table('data_ai_services', "### 🔬 AI Projects Details")
+
+    @st.fragment
+    @section_rerun
+    @profiled()
+    def ai_kpi_row(self):
+        """Depends on: sidebar filters, trend granularity"""
+        metrics = self.dataset_kpis('data_ai_services')['metrics']
+
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            active_ai = len(data[data['status'] == 'Active']) if 'status' in data.columns else 0
+            active_ai = int(metrics.get('active', 0))
             st.metric("Active AI Projects", active_ai)
-            self.mini_kpi_chart([max(0, active_ai-1), active_ai, active_ai], "Active AI Trend")
+            self.mini_kpi_chart(self.kpi_trend('data_ai_services', 'active'), "Active AI Trend")
         with col2:
-            try:
-                avg_acc = data['model_accuracy'].mean() if 'model_accuracy' in data.columns else 0
-            except Exception:
-                avg_acc = 0
+            avg_acc = metrics.get('avg_accuracy', 0)
             st.metric("Avg Model Accuracy", f"{avg_acc:.1f}%")
-            self.mini_kpi_chart([max(0, avg_acc-2), avg_acc, avg_acc], "Model Accuracy Trend")
+            self.mini_kpi_chart(self.kpi_trend('data_ai_services', 'avg_accuracy'), "Model Accuracy Trend")
         with col3:
-            try:
-                data_vol = data['data_volume_gb'].sum() if 'data_volume_gb' in data.columns else 0
-            except Exception:
-                data_vol = 0
+            data_vol = metrics.get('data_volume', 0)
             st.metric("Data Processed", f"{data_vol:.0f} GB")
-            self.mini_kpi_chart([max(0, data_vol-50), data_vol, data_vol], "Data Volume Trend")
+            self.mini_kpi_chart(self.kpi_trend('data_ai_services', 'data_volume'), "Data Volume Trend")
         with col4:
-            try:
-                auto_savings = data['automation_savings'].sum() if 'automation_savings' in data.columns else 0
-            except Exception:
-                auto_savings = 0
+            auto_savings = metrics.get('automation_savings', 0)
             st.metric("Automation Savings", f"PKR{auto_savings:,.0f}")
-            self.mini_kpi_chart([max(0, auto_savings*0.9), auto_savings, auto_savings], "Automation Savings Trend")
+            self.mini_kpi_chart(self.kpi_trend('data_ai_services', 'automation_savings'), "Automation Savings Trend")
+        self.sketch_row('data_ai_services', [
+            ("Distinct Clients", 'distinct_clients', "{:,}"),
+            ("Median Model Accuracy", 'median_accuracy', "{:.1f}%"),
+            ("P90 Model Accuracy", 'p90_accuracy', "{:.1f}%"),
+            ("Median Savings", 'median_savings', "PKR{:,.0f}"),
+        ])
+
+    @st.fragment
+    @section_rerun
+    @profiled()
+    def ai_chart_row(self):
+        """Depends on: sidebar filters"""
+        data = self.chart_data('data_ai_services')
+        kpis = self.dataset_kpis('data_ai_services')
 
         col1, col2 = st.columns(2)
         with col1:
             if 'service_type' in data.columns:
-                service_counts = data['service_type'].value_counts()
-                fig_service = px.bar(
-                    x=service_counts.index, y=service_counts.values,
-                    title="AI Service Types",
-                    color=service_counts.values
-                )
+                service_counts = kpis['distributions']['service_type']
+                fig_service = self.chart_generator.distribution_bar(service_counts, "AI Service Types")
                 st.plotly_chart(fig_service, use_container_width=True)
             else:
                 st.info("No 'service_type' column available for AI Service Types.")
         with col2:
             if all(c in data.columns for c in ['data_volume_gb', 'model_accuracy']):
-                fig_accuracy = px.scatter(
-                    data, x='data_volume_gb', y='model_accuracy',
-                    title="Data Volume vs Model Accuracy",
+                fig_accuracy = self.chart_generator.scatter(
+                    data, 'data_volume_gb', 'model_accuracy', "Data Volume vs Model Accuracy",
                     color='service_type' if 'service_type' in data.columns else None,
                     size='automation_savings' if 'automation_savings' in data.columns else None
                 )
@@ -458,10 +795,14 @@ class SolochoicezDashboard:
             else:
                 st.info("Not enough columns to plot Data Volume vs Model Accuracy.")
 
-        st.markdown("### 🔬 AI Projects Details")
-        self.download_buttons(data, "data_ai_services")
-        st.dataframe(self.styled_dataframe(data), use_container_width=True)
-
 if __name__ == "__main__":
-    dashboard = SolochoicezDashboard()
-    dashboard.run()
\ No newline at end of file
+    # Datasets, KPIs and figures live in process-wide caches shared by all sessions;
+    # the lease keeps what this session is showing from being evicted by the others
+    lease = st.session_state.setdefault('cache_lease', CacheLease())
+    with lease.rerun():
+        with timed('init'):
+            dashboard = SolochoicezDashboard()
+        with timed('first_render'):
+            dashboard.run()
+    # After the first page is shown, fill the caches the other views need
+    prewarm(dashboard.prewarm_tasks)
\ No newline at end of file
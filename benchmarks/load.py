@@ -0,0 +1,224 @@
+"""Load-test the dashboard with simulated concurrent sessions.
+
+    python -m benchmarks.load --sessions 1 4 16 --actions 20
+    python -m benchmarks.load --sessions 8 --workers 2 --rows 100000 --output load.json
+
+Each session is a headless Streamlit session (streamlit.testing AppTest)
+running app.py. Sessions of one worker process run in threads, sharing the
+process-wide caches as browser sessions on one server process do. Each
+session opens the dashboard, then performs random actions: switch view,
+move the 'Number of records to display' slider, toggle a department.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_ROOT = os.path.join(ROOT, "benchmarks", ".data")
+
+VIEWS = ['Overview', 'Information Technology', 'HR Solutions and Services', 'Business Consulting', 'Data Digitization']
+ACTIONS = ['switch_view', 'max_rows', 'toggle_department']
+
+
+def _rss():
+    """(current, peak) resident set size of this process in bytes; None where unavailable"""
+    current = peak = None
+    try:
+        with open("/proc/self/statm") as f:
+            current = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak *= 1 if sys.platform == 'darwin' else 1024
+    except ImportError:
+        pass
+    return current, peak
+
+
+def _act(at, action, rng):
+    """Apply one user action to a session's widgets; False when the current view doesn't offer it"""
+    if action == 'switch_view':
+        view = at.sidebar.selectbox[0]
+        view.select(rng.choice([v for v in VIEWS if v != view.value]))
+    elif action == 'max_rows':
+        try:
+            slider = at.slider(key='max_rows')
+        except KeyError:
+            return False
+        slider.set_value(rng.choice([v for v in range(10, 310, 10) if v != slider.value]))
+    else:
+        departments = at.sidebar.multiselect[0]
+        department = rng.choice(departments.options)
+        if department in departments.value:
+            departments.unselect(department)
+        else:
+            departments.select(department)
+    return True
+
+
+def _session(app_path, actions, think, seed, timeout, samples, lock):
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed)
+    at = AppTest.from_file(app_path, default_timeout=timeout)
+    steps = [('open', None)] + [(rng.choice(ACTIONS), None) for _ in range(actions)]
+    for action, _ in steps:
+        if action != 'open' and not _act(at, action, rng):
+            continue
+        started = time.perf_counter()
+        try:
+            at.run()
+            ok = not at.exception
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - started
+        with lock:
+            samples.append((action, elapsed, ok))
+        if think:
+            time.sleep(rng.uniform(0, 2 * think))
+
+
+def _share_runtime():
+    """Keep one mock Runtime for every session of this process.
+
+    AppTest installs a mock Runtime singleton for each run and removes it
+    when the run ends, which would pull it from under the runs of the other
+    sessions; the first one installed is kept and served to all of them.
+    """
+    from streamlit.runtime.runtime import Runtime
+
+    shared = []
+
+    def instance(cls):
+        if not shared and cls._instance is not None:
+            shared.append(cls._instance)
+        if not shared:
+            raise RuntimeError("Runtime hasn't been created!")
+        return shared[0]
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(lambda cls: bool(shared) or cls._instance is not None)
+
+
+def run_worker(workdir, sessions, actions, think, seed, timeout):
+    """Run ``sessions`` concurrent sessions in this process; returns their rerun samples and RSS"""
+    import streamlit.logger
+    from streamlit import config
+
+    # Loggers created later (e.g. for deprecation notices) read the level from the config
+    config.set_option('logger.level', 'error')
+    streamlit.logger.set_log_level('error')
+    _share_runtime()
+    os.chdir(workdir)
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    app_path = os.path.join(ROOT, "app.py")
+    samples, lock = [], threading.Lock()
+    threads = [
+        threading.Thread(target=_session, args=(app_path, actions, think, seed * 1000 + i, timeout, samples, lock))
+        for i in range(sessions)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+    rss, peak_rss = _rss()
+    return {'samples': samples, 'seconds': wall, 'rss_bytes': rss, 'peak_rss_bytes': peak_rss}
+
+
+def percentiles(seconds):
+    if not seconds:
+        return {'p50_ms': None, 'p95_ms': None, 'p99_ms': None, 'max_ms': None}
+    p50, p95, p99 = np.percentile(seconds, [50, 95, 99]) * 1000
+    return {'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99, 'max_ms': max(seconds) * 1000}
+
+
+def ensure_workdir(rows):
+    """Directory the workers run in: the repository, or one whose data/ holds ``rows`` synthetic rows per dataset"""
+    if rows is None:
+        return ROOT
+    from benchmarks.synthetic import generate
+    from config.settings import DATASETS
+
+    workdir = os.path.join(DATA_ROOT, f"load_{rows}")
+    data_dir = os.path.join(workdir, "data")
+    if not all(os.path.exists(os.path.join(data_dir, spec['file'])) for spec in DATASETS.values()):
+        print(f"Generating {rows:,} rows per dataset in {data_dir} ...")
+        generate(data_dir, rows)
+    return workdir
+
+
+def run(sessions, workers=1, actions=20, think=0.0, rows=None, seed=0, timeout=120):
+    """One load level per entry of ``sessions`` (concurrent sessions per worker), each in fresh worker processes"""
+    workdir = ensure_workdir(rows)
+    results = []
+    for level in sessions:
+        # Fresh processes per level, so every level starts from cold caches
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn')) as pool:
+            futures = [pool.submit(run_worker, workdir, level, actions, think, seed + w, timeout) for w in range(workers)]
+            reports = [f.result() for f in futures]
+        samples = [s for r in reports for s in r['samples']]
+        reruns = [s for s in samples if s[0] != 'open']
+        wall = max(r['seconds'] for r in reports)
+        result = {
+            'sessions': level,
+            'workers': workers,
+            'reruns': len(reruns),
+            'errors': sum(not ok for _, _, ok in samples),
+            'throughput_per_s': len(samples) / wall if wall else None,
+            **percentiles([s for _, s, _ in reruns]),
+            'open': percentiles([s for a, s, _ in samples if a == 'open']),
+            'actions': {a: percentiles([s for name, s, _ in reruns if name == a]) for a in ACTIONS},
+            'rss_bytes': [r['rss_bytes'] for r in reports],
+            'peak_rss_bytes': [r['peak_rss_bytes'] for r in reports],
+        }
+        results.append(result)
+        rss = max(filter(None, result['peak_rss_bytes']), default=None)
+        rss_text = f"{rss / 2**20:9.0f} MiB" if rss is not None else "        -"
+        print(f"{level * workers:>8} {result['reruns']:>7} {result['p50_ms'] or 0:9.0f} {result['p95_ms'] or 0:9.0f} "
+              f"{result['p99_ms'] or 0:9.0f} {result['throughput_per_s']:10.1f}/s {rss_text} {result['errors']:>6}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate concurrent dashboard sessions and report rerun latency, throughput and memory")
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 4, 16], help="Concurrent sessions per worker; one run per value")
+    parser.add_argument('--workers', type=int, default=1, help="Worker processes, each running --sessions sessions")
+    parser.add_argument('--actions', type=int, default=20, help="Actions per session after opening the dashboard")
+    parser.add_argument('--think', type=float, default=0.0, help="Mean pause between a session's actions, in seconds")
+    parser.add_argument('--rows', type=int, default=None, help="Use synthetic data with this many rows per dataset instead of data/")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=120, help="Seconds a single rerun may take before it counts as failed")
+    parser.add_argument('--output', default=None, help="Write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    print(f"{'sessions':>8} {'reruns':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'throughput':>12} {'peak RSS':>13} {'errors':>6}")
+    results = run(args.sessions, args.workers, args.actions, args.think, args.rows, args.seed, args.timeout)
+    if args.output:
+        document = {
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'cpus': os.cpu_count(),
+            'settings': {k: v for k, v in vars(args).items() if k != 'output'},
+            'results': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(document, f, indent=2)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""Benchmark the dashboard's hot paths on synthetic data of increasing size.
+
+    python -m benchmarks.run --sizes 10000 100000 1000000 --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run --sizes 10000 100000 1000000 --baseline benchmarks/baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import time
+import tracemalloc
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import generate
+from config.settings import DATASETS, TABLE_CONFIG
+from utils.charts import ChartGenerator
+from utils.data_loader import DataLoader, DatasetCache
+from utils.exports import EXCEL_MAX_ROWS, WRITERS, available_formats
+from utils.filters import RowFilter
+from utils.kpi_engine import KPIEngine
+from utils.snapshots import SnapshotStore
+from utils.tables import style_status_rows
+
+DATA_ROOT = os.path.join("benchmarks", ".data")
+# Excel export is skipped above this many rows; xlsxwriter needs minutes for millions of rows
+EXCEL_BENCH_MAX_ROWS = min(EXCEL_MAX_ROWS, 100000)
+
+
+def ensure_data(rows):
+    """Synthetic CSVs with ``rows`` rows per dataset, generated once and reused"""
+    out_dir = os.path.join(DATA_ROOT, str(rows))
+    if not all(os.path.exists(os.path.join(out_dir, spec['file'])) for spec in DATASETS.values()):
+        print(f"Generating {rows:,} rows per dataset in {out_dir} ...")
+        generate(out_dir, rows)
+    return out_dir
+
+
+def csv_loader(data_dir):
+    loader = DataLoader(data_dir, cache=DatasetCache(), backend='csv')
+    loader.snapshots = None
+    return loader
+
+
+def build_stages(data_dir, rows):
+    """(name, function) pairs run in order; each function returns the number of rows it processed.
+
+    The shared loader is warmed here, untimed, so stages other than the
+    load stages measure work on already-parsed frames.
+    """
+    warm = csv_loader(data_dir)
+    for name in DATASETS:
+        warm.load(name)
+    snapshot_dir = os.path.join(data_dir, "snapshots")
+    row_filter = RowFilter({'status': ['Active']}, (date(2024, 3, 1), date(2024, 6, 30)))
+
+    def load_csv():
+        loader = csv_loader(data_dir)
+        return sum(len(loader.load(name)) for name in DATASETS)
+
+    def load_cached():
+        return sum(len(warm.load(name)) for name in DATASETS)
+
+    def snapshot_build():
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+        store = SnapshotStore(snapshot_dir)
+        for name, spec in DATASETS.items():
+            path = os.path.join(data_dir, spec['file'])
+            stat = os.stat(path)
+            store.build(name, path, (stat.st_mtime_ns, stat.st_size))
+        return rows * len(DATASETS)
+
+    def snapshot_read():
+        loader = DataLoader(data_dir, cache=DatasetCache(), backend='csv')
+        loader.snapshots = SnapshotStore(snapshot_dir)
+        return sum(len(loader.load(name)) for name in DATASETS)
+
+    def filter_csv():
+        loader = csv_loader(data_dir)
+        return sum(len(loader.load(name, row_filter)) for name in DATASETS)
+
+    def kpis():
+        engine = KPIEngine(warm, cache=DatasetCache())
+        for name in DATASETS:
+            engine.compute(name)
+        return rows * len(DATASETS)
+
+    def style():
+        df = warm.load('it_solutions').head(TABLE_CONFIG['style_max_rows'])
+        style_status_rows(df).to_html()
+        return len(df)
+
+    def export(fmt):
+        def run():
+            df = warm.load('hr_staffing')
+            WRITERS[fmt](df)
+            return len(df)
+        return run
+
+    def figures():
+        charts = ChartGenerator(cache=DatasetCache())
+        hr = warm.load('hr_staffing')
+        payload = 0
+        payload += len(charts.scatter(hr, 'performance_score', 'salary', "Performance vs Salary", color='department', size='experience_years').to_json())
+        payload += len(charts.distribution_pie(hr['department'].value_counts(), "Departments").to_json())
+        it = warm.load('it_solutions')
+        payload += len(charts.category_bar(it, 'project_name', 'completion_percentage', "Completion").to_json())
+        figures.payload = payload
+        return len(hr) + len(it)
+
+    stages = [
+        ('load_csv', load_csv),
+        ('load_cached', load_cached),
+        ('snapshot_build', snapshot_build),
+        ('snapshot_read', snapshot_read),
+        ('filter_csv', filter_csv),
+        ('kpis', kpis),
+        ('style', style),
+    ]
+    sample = warm.load('hr_staffing').head(1)
+    for fmt in WRITERS:
+        if fmt not in available_formats(sample) or (fmt == 'xlsx' and rows > EXCEL_BENCH_MAX_ROWS):
+            continue
+        stages.append((f"export_{fmt}", export(fmt)))
+    stages.append(('figures', figures))
+    return stages, figures
+
+
+def measure(fn, repeat=5, memory=True):
+    """Best wall time and spread (slowest minus best) over ``repeat`` runs, plus
+    Python-tracked peak allocation of one extra run"""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        processed = fn()
+        times.append(time.perf_counter() - started)
+    peak = None
+    if memory:
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return min(times), max(times) - min(times), peak, processed
+
+
+def calibrate(repeat=5):
+    """Best time of a fixed CPU workload (sort, groupby, CSV write), to scale baselines by machine speed"""
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({'key': rng.integers(0, 100, 200000), 'value': rng.random(200000)})
+
+    def workload():
+        np.sort(frame['value'].to_numpy())
+        frame.groupby('key')['value'].mean()
+        frame.head(20000).to_csv(index=False)
+
+    return measure(workload, repeat, memory=False)[0]
+
+
+def run(sizes, repeat=5, memory=True):
+    results = []
+    for rows in sizes:
+        data_dir = ensure_data(rows)
+        stages, figures = build_stages(data_dir, rows)
+        for name, fn in stages:
+            seconds, spread, peak, processed = measure(fn, repeat, memory)
+            result = {'rows': rows, 'stage': name, 'seconds': seconds, 'spread_seconds': spread,
+                      'peak_bytes': peak, 'processed_rows': processed}
+            if name == 'figures':
+                result['payload_bytes'] = figures.payload
+            results.append(result)
+            peak_text = f"{peak / 2**20:9.1f} MiB" if peak is not None else "        -"
+            print(f"{rows:>11,} {name:<16} {seconds * 1000:10.1f} ms {spread * 1000:8.1f} ms {peak_text}")
+    return results
+
+
+def compare(results, baseline, tolerance, min_delta=0.0, scale=1.0):
+    """Stages slower than baseline * tolerance, as (rows, stage, seconds, baseline_seconds).
+
+    Baseline times are first multiplied by ``scale``, the ratio of this run's
+    calibration time to the baseline's, so a slower or busier machine does not
+    read as a regression. A slowdown must also exceed the run-to-run spread
+    measured in either run and ``min_delta`` seconds.
+    """
+    reference = {(r['rows'], r['stage']): r for r in baseline['results']}
+    regressions = []
+    for r in results:
+        base = reference.get((r['rows'], r['stage']))
+        if not base or not base['seconds']:
+            continue
+        expected = base['seconds'] * scale
+        noise = max(r.get('spread_seconds', 0), base.get('spread_seconds', 0), min_delta)
+        if r['seconds'] > expected * tolerance and r['seconds'] - expected > noise:
+            regressions.append((r['rows'], r['stage'], r['seconds'], expected))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark loading, filtering, KPIs, styling, exports and charts")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000], help="Rows per dataset, e.g. 10000 100000 1000000 10000000")
+    parser.add_argument('--repeat', type=int, default=5, help="Timed runs per stage (best is kept, slowest minus best is the spread)")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the extra tracemalloc run per stage")
+    parser.add_argument('--output', default=None, help="Write results to this JSON file")
+    parser.add_argument('--baseline', default=None, help="Compare against a saved baseline and fail on regressions")
+    parser.add_argument('--save-baseline', default=None, help="Save these results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=1.25, help="Allowed slowdown factor against the baseline")
+    parser.add_argument('--min-delta', type=float, default=0.005, help="Slowdowns under this many seconds are never regressions")
+    args = parser.parse_args(argv)
+
+    print(f"{'rows':>11} {'stage':<16} {'time':>13} {'spread':>11} {'peak alloc':>13}")
+    calibration = calibrate(args.repeat)
+    results = run(args.sizes, args.repeat, not args.no_memory)
+    # the machine's speed may drift during the run; keep the faster of the two measurements
+    calibration = min(calibration, calibrate(args.repeat))
+    document = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'calibration_seconds': calibration,
+        'results': results,
+    }
+    for path in filter(None, [args.output, args.save_baseline]):
+        with open(path, 'w') as f:
+            json.dump(document, f, indent=2)
+        print(f"Wrote {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        scale = calibration / baseline['calibration_seconds'] if baseline.get('calibration_seconds') else 1.0
+        print(f"Calibration {calibration * 1000:.1f} ms, baseline times scaled by {scale:.2f}")
+        regressions = compare(results, baseline, args.tolerance, args.min_delta, scale)
+        for rows, stage, seconds, base in regressions:
+            print(f"REGRESSION {rows:,} rows {stage}: {seconds * 1000:.1f} ms vs baseline {base * 1000:.1f} ms (scaled)")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
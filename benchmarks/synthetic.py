@@ -0,0 +1,139 @@
+"""Synthetic department datasets that follow the schemas and date formats of data/*.csv."""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from config.settings import DATASETS
+
+IT_PROJECTS = ['E-commerce Platform', 'Mobile Banking App', 'CRM System', 'Inventory Management',
+               'Learning Management System', 'Healthcare Portal', 'Real Estate Platform', 'Food Delivery App',
+               'Social Media Dashboard', 'Financial Analytics Tool', 'IoT Monitoring System', 'Blockchain Wallet',
+               'AI Chatbot Platform', 'Document Management', 'Video Streaming App', 'Logistics Tracker',
+               'HR Management System', 'Customer Support Portal', 'Analytics Dashboard', 'Cloud Migration Project']
+IT_CLIENTS = ['TechCorp Ltd', 'FinanceFirst', 'RetailMax', 'HealthPlus', 'EduTech Solutions', 'MediCare Systems',
+              'PropTech Inc', 'FoodieExpress', 'SocialConnect', 'InvestSmart', 'SmartDevices Co', 'CryptoSecure',
+              'ChatBot Solutions', 'DocuFlow', 'StreamTech', 'LogiTrack', 'PeopleFirst', 'SupportDesk',
+              'DataViz Pro', 'CloudMasters']
+TECHNOLOGIES = ['React/Node.js', 'Angular/.NET', 'Python/Django', 'Flutter', 'Java/Spring', 'PHP/Laravel']
+DEPARTMENTS = ['Data & AI Services', 'HR & Staffing', 'IT Solutions', 'Business Consulting']
+POSITIONS = ['Senior', 'Manager', 'Lead', 'Junior', 'Director']
+CONSULTING_AREAS = ['HR', 'Finance', 'Strategy', 'Marketing', 'Operations', 'Technology']
+SERVICE_TYPES = ['Computer Vision', 'Automation', 'Machine Learning', 'Data Analytics', 'NLP', 'Predictive Analytics']
+
+
+def _dates(rng, n, start, end):
+    days = (pd.Timestamp(end) - pd.Timestamp(start)).days
+    return pd.Timestamp(start) + pd.to_timedelta(rng.integers(0, days + 1, n), unit='D')
+
+
+def _format_dates(dates, date_format):
+    """Format like the source files: ISO, zero-padded m/d/Y, or unpadded m/d/Y"""
+    if date_format == '%m/%d/%Y-unpadded':
+        index = pd.DatetimeIndex(dates)
+        return index.month.astype(str) + '/' + index.day.astype(str) + '/' + index.year.astype(str)
+    return pd.DatetimeIndex(dates).strftime(date_format)
+
+
+def _numbered(prefix, ids):
+    return prefix + pd.Series(ids).astype(str)
+
+
+def it_solutions(rng, ids):
+    n = len(ids)
+    return pd.DataFrame({
+        'project_id': ids,
+        'project_name': rng.choice(IT_PROJECTS, n),
+        'client_name': rng.choice(IT_CLIENTS, n),
+        'technology': rng.choice(TECHNOLOGIES, n),
+        'status': rng.choice(['Completed', 'Planning', 'Active'], n),
+        'completion_percentage': rng.integers(1, 11, n) * 10,
+        'budget': rng.integers(900000, 5000000, n),
+        'start_date': _format_dates(_dates(rng, n, '2024-01-01', '2024-12-31'), '%m/%d/%Y-unpadded'),
+        'team_size': rng.integers(3, 16, n),
+    })
+
+
+def hr_staffing(rng, ids):
+    n = len(ids)
+    return pd.DataFrame({
+        'employee_id': ids,
+        'name': _numbered('Employee ', ids),
+        'department': rng.choice(DEPARTMENTS, n),
+        'position': rng.choice(POSITIONS, n),
+        'salary': rng.integers(300000, 1500000, n),
+        'experience_years': rng.integers(1, 16, n),
+        'performance_score': rng.uniform(6, 10, n),
+        'status': rng.choice(['Active', 'On Leave', 'Notice Period'], n),
+        'join_date': _format_dates(_dates(rng, n, '2020-01-01', '2028-12-31'), '%m/%d/%Y-unpadded'),
+    })
+
+
+def business_consulting(rng, ids):
+    n = len(ids)
+    start = _dates(rng, n, '2024-01-01', '2025-03-01')
+    return pd.DataFrame({
+        'project_id': ids,
+        'client_name': _numbered('Client Corp ', ids),
+        'consulting_area': rng.choice(CONSULTING_AREAS, n),
+        'project_value': rng.integers(200000, 2000000, n),
+        'duration_months': rng.integers(3, 18, n),
+        'status': rng.choice(['Planning', 'Active', 'Completed'], n),
+        'client_satisfaction': rng.uniform(7, 10, n),
+        'start_date': _format_dates(start, '%Y-%m-%d'),
+        'end_date': _format_dates(start + pd.to_timedelta(rng.integers(30, 200, n), unit='D'), '%Y-%m-%d'),
+        'consultant_assigned': _numbered('Consultant ', ids),
+    })
+
+
+def data_ai_services(rng, ids):
+    n = len(ids)
+    return pd.DataFrame({
+        'project_id': ids,
+        'project_name': _numbered('AI Project ', ids),
+        'client_name': _numbered('AI Client ', ids),
+        'service_type': rng.choice(SERVICE_TYPES, n),
+        'model_accuracy': rng.uniform(75, 97, n),
+        'data_volume_gb': rng.integers(10, 1001, n),
+        'automation_savings': rng.integers(100000, 1000000, n),
+        'status': rng.choice(['Completed', 'Testing', 'Active'], n),
+        'start_date': _format_dates(_dates(rng, n, '2024-01-01', '2024-08-01'), '%m/%d/%Y'),
+        'deployment_date': _format_dates(_dates(rng, n, '2024-03-01', '2024-12-31'), '%m/%d/%Y'),
+    })
+
+
+GENERATORS = {
+    'it_solutions': it_solutions,
+    'hr_staffing': hr_staffing,
+    'business_consulting': business_consulting,
+    'data_ai_services': data_ai_services,
+}
+
+
+def generate(out_dir, rows, seed=42, chunksize=1000000, datasets=None):
+    """Write ``rows`` synthetic rows per dataset into out_dir, using the file names from DATASETS"""
+    os.makedirs(out_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    paths = {}
+    for name in datasets or GENERATORS:
+        path = os.path.join(out_dir, DATASETS[name]['file'])
+        for start in range(0, rows, chunksize):
+            ids = np.arange(start + 1, min(start + chunksize, rows) + 1)
+            GENERATORS[name](rng, ids).to_csv(path, mode='w' if start == 0 else 'a', header=(start == 0), index=False)
+        paths[name] = path
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic department CSVs")
+    parser.add_argument('rows', type=int, help="Rows per dataset")
+    parser.add_argument('--out', default="benchmarks/.data/custom", help="Output directory")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+    for name, path in generate(args.out, args.rows, args.seed).items():
+        print(f"{name}: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -34,8 +34,180 @@ DATABASE_CONFIG = {
     'path': 'data/solochoicez.db'
 }
 
+# Record statuses offered by the sidebar status filter
+STATUSES = ['Active', 'Planning', 'Testing', 'Completed', 'On Hold', 'On Leave', 'Notice Period']
+
+# Rows parsed per chunk when filtering CSV files during the read
+CSV_CHUNKSIZE = 100000
+
+# Columnar (Parquet) snapshots of the CSVs with normalized dtypes; needs pyarrow.
+# Kept in this directory inside each DataLoader's data directory (data/snapshots/)
+SNAPSHOT_CONFIG = {
+    'enabled': True,
+    'directory': 'snapshots'
+}
+
+# Append-only ingestion: keep each CSV parsed in memory and parse only the rows
+# appended since the last read. Replaces snapshots for the CSV backend when enabled.
+APPEND_CONFIG = {
+    'enabled': False,
+    'verify_bytes': 256,
+    'history': 16
+}
+
+# Worker threads DataLoader.load_many uses to load datasets concurrently
+LOADER_CONFIG = {
+    'max_workers': 4
+}
+
+# Headless KPI report (python -m utils.report); the dashboard preloads it when present
+REPORT_CONFIG = {
+    'path': 'reports/',
+    'file': 'kpi_report.json'
+}
+
+# Partitioned datasets: a directory named after the dataset's file (data/it_solutions/)
+# holding one CSV per month plus a manifest of each partition's rows and date bounds.
+# Used instead of the flat file when present (split one with `python -m utils.partitions split`)
+PARTITION_CONFIG = {
+    'manifest': 'manifest.json',
+    'cache_entries': 256
+}
+
+# After the first page of a new process is shown, load every view's data, KPIs and
+# trends for the current filters in a background thread (see utils/startup.py)
+STARTUP_CONFIG = {
+    'prewarm': True
+}
+
+# Approximate statistics (utils/sketches.py): quantile sketch size k (rank error about 1/k),
+# distinct-count precision (2**p registers, about 1.6% error at 12), up to how many distinct
+# values are counted exactly, the columns sketches are kept per value of so the sidebar
+# filters can select them, and the directory inside the data directory they are saved in
+SKETCH_CONFIG = {
+    'directory': 'sketches',
+    # Largest compactor; a sketch keeps at most a few times this many values. Rank error is about 1/quantile_k
+    'quantile_k': 800,
+    'hll_precision': 12,
+    'exact_distinct': 1024,
+    'groups': ['department', 'status'],
+    'cache_entries': 32
+}
+
+# Storage backend used by DataLoader: 'csv' or 'sqlite' (see DATABASE_CONFIG)
+DATA_BACKEND = 'csv'
+
+# Department datasets: source file, key column, date columns with their format,
+# the columns the sidebar date range is matched against (one date, or a start/end pair)
+# the low-cardinality columns stored as categoricals, the smaller (nullable) dtypes
+# numeric columns are downcast to when their values fit, and the 'top N' row-limit key
+DATASETS = {
+    'it_solutions': {
+        'file': 'it_solutions.csv',
+        'id_column': 'project_id',
+        'date_columns': ['start_date'],
+        'date_format': '%m/%d/%Y',
+        'period_columns': ['start_date'],
+        'category_columns': ['status', 'technology', 'project_name', 'client_name'],
+        'compact_dtypes': {'project_id': 'Int32', 'completion_percentage': 'Int8', 'budget': 'Int32', 'team_size': 'Int8'},
+        'sort_column': 'budget'
+    },
+    'hr_staffing': {
+        'file': 'hr_staffing.csv',
+        'id_column': 'employee_id',
+        'date_columns': ['join_date'],
+        'date_format': '%m/%d/%Y',
+        'period_columns': ['join_date'],
+        'category_columns': ['status', 'department', 'position'],
+        'compact_dtypes': {'employee_id': 'Int32', 'salary': 'Int32', 'experience_years': 'Int8'},
+        'sort_column': 'salary'
+    },
+    'business_consulting': {
+        'file': 'business_consulting.csv',
+        'id_column': 'project_id',
+        'date_columns': ['start_date', 'end_date'],
+        'date_format': '%Y-%m-%d',
+        'period_columns': ['start_date', 'end_date'],
+        'category_columns': ['status', 'consulting_area'],
+        'compact_dtypes': {'project_id': 'Int32', 'project_value': 'Int32', 'duration_months': 'Int8'},
+        'sort_column': 'project_value'
+    },
+    'data_ai_services': {
+        'file': 'data_ai_services.csv',
+        'id_column': 'project_id',
+        'date_columns': ['start_date', 'deployment_date'],
+        'date_format': '%m/%d/%Y',
+        'period_columns': ['deployment_date'],
+        'category_columns': ['status', 'service_type'],
+        'compact_dtypes': {'project_id': 'Int32', 'data_volume_gb': 'Int32', 'automation_savings': 'Int32'},
+        'sort_column': 'automation_savings'
+    }
+}
+
+# Drill-down cube (utils/cube.py): hierarchy levels, and per dataset its department,
+# the column used as the 'category' level and the PKR column summed as 'value'
+CUBE_CONFIG = {
+    'levels': ['department', 'status', 'category', 'month'],
+    'datasets': {
+        'it_solutions': {'department': 'IT Solutions', 'category': 'technology', 'value': 'budget', 'label': 'IT project budgets'},
+        'hr_staffing': {'department': 'HR & Staffing', 'category': 'position', 'value': 'salary', 'label': 'Staff salaries'},
+        'business_consulting': {'department': 'Business Consulting', 'category': 'consulting_area', 'value': 'project_value', 'label': 'Consulting project values'},
+        'data_ai_services': {'department': 'Data & AI Services', 'category': 'service_type', 'value': 'automation_savings', 'label': 'AI automation savings'}
+    },
+    'cache_entries': 16
+}
+
+# How the sidebar row limit picks rows: the largest sort_column values, the earliest or
+# latest by the first period column, or each strata group's share in file order
+LIMIT_CONFIG = {
+    'modes': {
+        'stratified': "Representative (by department/status)",
+        'top': "Top by value",
+        'tail': "Most recent",
+        'head': "Earliest"
+    },
+    'default_mode': 'stratified',
+    'strata': ['department', 'status']
+}
+
+# Row background per record status in the detail tables
+STATUS_COLORS = {
+    'On Hold': '#ffe6e6',
+    'Planning': '#fff4e6',
+    'Completed': '#e6ffe6',
+    'Active': '#e6f0ff'
+}
+
+# Detail table rendering; larger frames are shown without row colours
+TABLE_CONFIG = {
+    'style_max_rows': 5000
+}
+
+# Download exports: rows serialized per CSV chunk and number of generated files kept
+EXPORT_CONFIG = {
+    'csv_chunksize': 50000,
+    'cache_entries': 8
+}
+
 # Chart configurations
+# max_points: rows above which charts aggregate or bin before plotting, and the most bars or
+# timeline intervals a figure carries
 CHART_CONFIG = {
     'height': 400,
-    'template': 'plotly_white'
+    'template': 'plotly_white',
+    'max_points': 2000,
+    'scatter_bins': 40,
+    'cache_entries': 64,
+    # Columns each department view's charts plot; only these are loaded for the chart row
+    'columns': {
+        'it_solutions': ['project_name', 'completion_percentage', 'technology'],
+        'hr_staffing': ['department', 'performance_score', 'salary', 'experience_years'],
+        'business_consulting': ['consulting_area', 'start_date', 'end_date', 'client_name', 'status'],
+        'data_ai_services': ['service_type', 'data_volume_gb', 'model_accuracy', 'automation_savings'],
+    }
+}
+
+# Dataset cache configuration
+CACHE_CONFIG = {
+    'max_entries': 64
 }
@@ -0,0 +1,16 @@
+import os
+import shutil
+
+import pytest
+
+from config.settings import DATASETS
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+
+@pytest.fixture
+def data_path(tmp_path):
+    """A copy of the sample CSVs, so tests can change files and write snapshots or sketches beside them"""
+    for spec in DATASETS.values():
+        shutil.copy(os.path.join(DATA_DIR, spec['file']), tmp_path)
+    return str(tmp_path) + os.sep
@@ -0,0 +1,46 @@
+import os
+
+from config.settings import DATASETS
+from utils.appends import AppendTracker
+from utils.data_loader import file_signature
+
+SPEC = DATASETS['it_solutions']
+
+
+def append_copy(path, count):
+    """Append the first ``count`` data lines again with new ids"""
+    with open(path, newline='') as fh:
+        lines = fh.read().splitlines()
+    with open(path, 'a', newline='') as fh:
+        for i, line in enumerate(lines[1:count + 1]):
+            fh.write(f"{9000 + i}{line[line.index(','):]}\n")
+
+
+def test_only_appended_rows_are_returned(data_path):
+    path = os.path.abspath(os.path.join(data_path, SPEC['file']))
+    tracker = AppendTracker()
+    before = file_signature(path)
+    rows = len(tracker.read(path, SPEC, before))
+    append_copy(path, 3)
+    after = file_signature(path)
+    frame = tracker.read(path, SPEC, after)
+    new = tracker.appended_since(path, before)
+    assert len(frame) == rows + 3
+    assert new['project_id'].tolist() == [9000, 9001, 9002]
+    assert tracker.appended_since(path, after).empty
+
+
+def test_rewritten_file_is_read_in_full(data_path):
+    path = os.path.abspath(os.path.join(data_path, SPEC['file']))
+    tracker = AppendTracker()
+    before = file_signature(path)
+    rows = len(tracker.read(path, SPEC, before))
+    with open(path, newline='') as fh:
+        text = fh.read().rstrip('\r\n')
+    with open(path, 'w', newline='') as fh:
+        # the last row's team size is edited in place
+        fh.write(text[:-1] + ('8' if text[-1] == '9' else '9') + '\n')
+    append_copy(path, 1)
+    frame = tracker.read(path, SPEC, file_signature(path))
+    assert len(frame) == rows + 1
+    assert tracker.appended_since(path, before) is None
@@ -0,0 +1,57 @@
+from utils.data_loader import CacheLease, DatasetCache
+
+
+def key(name, signature='v1'):
+    return ('/data/file.csv', signature, name)
+
+
+def fill(cache, *names):
+    for name in names:
+        if cache.get(key(name)) is None:
+            cache.put(key(name), name)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = DatasetCache(2)
+    fill(cache, 'a', 'b')
+    cache.get(key('a'))
+    fill(cache, 'c')
+    assert key('a') in cache and key('c') in cache
+    assert key('b') not in cache
+
+
+def test_new_signature_drops_stale_entries():
+    cache = DatasetCache(8)
+    fill(cache, 'a', 'b')
+    cache.put(key('a', 'v2'), 'a2')
+    assert key('a') not in cache and key('b') not in cache
+    assert cache.get(key('a', 'v2')) == 'a2'
+
+
+def test_leased_entries_survive_eviction_until_released():
+    cache, lease = DatasetCache(1), CacheLease()
+    with lease.rerun():
+        fill(cache, 'a')
+    fill(cache, 'b', 'c')
+    assert key('a') in cache
+    assert lease.held == 1
+    with lease.rerun():
+        fill(cache, 'd')
+    assert key('a') not in cache
+    assert lease.held == 1
+
+
+def test_scoped_rerun_releases_only_its_own_entries():
+    cache, lease = DatasetCache(1), CacheLease()
+    with lease.rerun():
+        fill(cache, 'page', 'chart')
+    with lease.rerun(scope=('table',)):
+        fill(cache, 'page 2')
+    with lease.rerun(scope=('table',)):
+        fill(cache, 'page 3')
+    assert key('page') in cache and key('chart') in cache and key('page 3') in cache
+    assert key('page 2') not in cache
+    with lease.rerun():
+        fill(cache, 'chart')
+    assert lease.held == 1
+    assert key('chart') in cache and key('page') not in cache
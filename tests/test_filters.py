@@ -0,0 +1,70 @@
+import pandas as pd
+import pytest
+
+from config.settings import DATASETS
+from utils.filters import RowFilter, RowLimit, stratum_quotas
+
+SPEC = DATASETS['it_solutions']
+
+
+@pytest.fixture
+def projects():
+    return pd.DataFrame({
+        'project_id': range(10),
+        'budget': [5, 1, 9, 3, 7, 2, 8, 4, 6, 0],
+        # latest first, so file order and date order differ
+        'start_date': pd.date_range('2024-01-01', periods=10, freq='D')[::-1],
+        'status': ['Active'] * 6 + ['Completed'] * 3 + ['Planning'],
+    })
+
+
+def test_top_keeps_largest_sort_column_values(projects):
+    assert RowLimit(3, 'top').apply(projects, SPEC)['budget'].tolist() == [9, 8, 7]
+
+
+def test_head_and_tail_follow_the_period_column(projects):
+    assert RowLimit(3, 'head').apply(projects, SPEC)['project_id'].tolist() == [9, 8, 7]
+    assert RowLimit(3, 'tail').apply(projects, SPEC)['project_id'].tolist() == [0, 1, 2]
+
+
+def test_stratified_takes_each_status_share_in_file_order(projects):
+    # shares of 5 rows over 6/3/1: 3, 1.5, 0.5 -> the first remainder wins the last row
+    assert RowLimit(5, 'stratified').apply(projects, SPEC)['project_id'].tolist() == [0, 1, 2, 6, 7]
+
+
+def test_limit_above_row_count_keeps_every_row(projects):
+    for mode in ['stratified', 'top', 'tail', 'head']:
+        assert len(RowLimit(50, mode).apply(projects, SPEC)) == len(projects)
+
+
+def test_ranking_puts_the_limited_rows_first(projects):
+    limit = RowLimit(5, 'stratified')
+    order = limit.order(projects, SPEC)
+    ranking = limit.ranking(order)
+    assert sorted(ranking) == list(range(len(projects)))
+    assert list(ranking[:5]) == list(limit.select(order))
+
+
+def test_stratum_quotas_sum_to_n():
+    assert stratum_quotas([6, 3, 1], 5).tolist() == [3, 2, 0]
+    assert stratum_quotas([7, 7, 7], 10).sum() == 10
+    assert stratum_quotas([2, 1], 10).tolist() == [2, 1]
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        RowLimit(10, 'random')
+
+
+def test_filter_key_ignores_selection_order():
+    assert RowFilter({'status': ['Planning', 'Active']}).key() == RowFilter({'status': ['Active', 'Planning']}).key()
+
+
+def test_values_and_date_range_are_combined(projects):
+    row_filter = RowFilter({'status': ['Active', 'Planning']}, date_range=('2024-01-03', '2024-01-06'))
+    # start dates run backwards from 2024-01-10, so ids 4..7 fall in the range
+    assert row_filter.apply(projects, SPEC)['project_id'].tolist() == [4, 5]
+
+
+def test_predicates_on_missing_columns_are_ignored(projects):
+    assert RowFilter({'department': ['IT']}).mask(projects, SPEC) is None
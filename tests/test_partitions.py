@@ -0,0 +1,48 @@
+import os
+
+import pandas as pd
+
+from config.settings import DATASETS
+from utils.data_loader import DataLoader, DatasetCache
+from utils.filters import RowFilter
+from utils.partitions import PartitionedDataset, partition_dir, split
+
+DATASET = 'it_solutions'
+
+
+def split_dataset(data_path):
+    directory = os.path.abspath(partition_dir(data_path, DATASET))
+    split(os.path.join(data_path, DATASETS[DATASET]['file']), directory, DATASET)
+    return directory
+
+
+def test_manifest_covers_every_row(data_path):
+    directory = split_dataset(data_path)
+    entries = PartitionedDataset(directory, DATASET).manifest()
+    flat = DataLoader(data_path, cache=DatasetCache()).load(DATASET)
+    assert sum(entry['rows'] for entry in entries) == len(flat)
+
+
+def test_date_range_reads_only_overlapping_partitions(data_path):
+    directory = split_dataset(data_path)
+    partitions = PartitionedDataset(directory, DATASET)
+    row_filter = RowFilter(date_range=(pd.Timestamp('2024-03-01'), pd.Timestamp('2024-04-15')))
+    kept = partitions.prune(partitions.manifest(), row_filter)
+    assert [entry['file'] for entry in kept] == ['2024-03.csv', '2024-04.csv']
+
+
+def test_partitioned_and_flat_loads_match(data_path):
+    row_filter = RowFilter({'status': ['Active']}, (pd.Timestamp('2024-02-10'), pd.Timestamp('2024-05-20')))
+    flat = DataLoader(data_path, cache=DatasetCache()).load(DATASET, row_filter)
+    split_dataset(data_path)
+    loader = DataLoader(data_path, cache=DatasetCache())
+    assert loader._partitions(DATASET) is not None
+    partitioned = loader.load(DATASET, row_filter)
+    assert sorted(partitioned['project_id']) == sorted(flat['project_id'])
+
+
+def test_empty_partition_directory_falls_back_to_flat_file(data_path):
+    os.makedirs(partition_dir(data_path, DATASET))
+    loader = DataLoader(data_path, cache=DatasetCache())
+    assert loader._partitions(DATASET) is None
+    assert not loader.load(DATASET).empty
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.sketches import DistinctSketch, QuantileSketch
+
+
+def rank_error(values, estimate, q):
+    return abs((values <= estimate).mean() - q)
+
+
+def test_merged_quantile_sketches_stay_within_rank_error():
+    values = np.random.default_rng(0).lognormal(10, 1, 200_000)
+    left = QuantileSketch(200).update(values[:120_000])
+    right = QuantileSketch(200).update(values[120_000:])
+    merged = left.merge(right)
+    assert merged.count == len(values)
+    assert (merged.min, merged.max) == (values.min(), values.max())
+    for q in [0.1, 0.5, 0.9, 0.99]:
+        assert rank_error(values, merged.quantile(q), q) < 0.02
+
+
+def test_quantile_sketch_round_trips():
+    sketch = QuantileSketch(50).update(np.arange(10_000))
+    restored = QuantileSketch.from_dict(sketch.to_dict())
+    assert restored.quantiles([0.25, 0.5, 0.75]).tolist() == sketch.quantiles([0.25, 0.5, 0.75]).tolist()
+
+
+def test_small_distinct_counts_are_exact_after_merge():
+    left = DistinctSketch(exact_limit=100).update(pd.Series([f"client {i}" for i in range(40)]))
+    right = DistinctSketch(exact_limit=100).update(pd.Series([f"client {i}" for i in range(30, 70)]))
+    assert left.merge(right).estimate() == 70
+
+
+def test_large_distinct_counts_are_estimated():
+    left = DistinctSketch(exact_limit=100).update(pd.Series(np.arange(30_000)))
+    right = DistinctSketch(exact_limit=100).update(pd.Series(np.arange(20_000, 50_000)))
+    merged = DistinctSketch.from_dict(left.merge(right).to_dict())
+    assert merged.hashes is None
+    assert merged.estimate() == pytest.approx(50_000, rel=0.05)
@@ -0,0 +1,54 @@
+import pytest
+
+from config.settings import DATABASE_CONFIG
+from utils.data_loader import DataLoader, DatasetCache
+from utils.filters import RowFilter, RowLimit
+from utils.kpi_engine import KPIEngine
+from utils.sqlite_store import SQLiteStore
+
+DATASETS = {'it_solutions': 'project_id', 'hr_staffing': 'employee_id', 'data_ai_services': 'project_id'}
+MODES = ['stratified', 'top', 'tail', 'head']
+
+
+@pytest.fixture
+def loaders(data_path, tmp_path, monkeypatch):
+    """(in-memory loader, SQLite loader) over the same CSVs"""
+    monkeypatch.setitem(DATABASE_CONFIG, 'path', str(tmp_path / 'dashboard.db'))
+    SQLiteStore().ingest(data_path)
+    memory = DataLoader(data_path, cache=DatasetCache(64), backend='csv')
+    sqlite = DataLoader(data_path, cache=DatasetCache(64), backend='sqlite')
+    assert sqlite.store is not None
+    return memory, sqlite
+
+
+@pytest.mark.parametrize('dataset', DATASETS)
+def test_kpis_match(loaders, dataset):
+    row_filter = RowFilter({'status': ['Active', 'Completed']})
+    memory, sqlite = (KPIEngine(loader, cache=DatasetCache(), partials=DatasetCache()).compute(dataset, row_filter)
+                      for loader in loaders)
+    assert memory['metrics'].keys() == sqlite['metrics'].keys()
+    for name, value in memory['metrics'].items():
+        assert sqlite['metrics'][name] == pytest.approx(value)
+    for column, counts in memory['distributions'].items():
+        assert sqlite['distributions'][column].to_dict() == counts.to_dict()
+
+
+@pytest.mark.parametrize('dataset', DATASETS)
+@pytest.mark.parametrize('mode', MODES)
+def test_limited_rows_match(loaders, dataset, mode):
+    id_column = DATASETS[dataset]
+    row_filter = RowFilter({'status': ['Active', 'Completed', 'Planning']})
+    memory, sqlite = (loader.load(dataset, row_filter, limit=RowLimit(40, mode)) for loader in loaders)
+    assert sorted(memory[id_column]) == sorted(sqlite[id_column])
+
+
+@pytest.mark.parametrize('dataset', DATASETS)
+@pytest.mark.parametrize('mode', MODES)
+@pytest.mark.parametrize('search', ['', 'a'])
+def test_pages_match(loaders, dataset, mode, search):
+    id_column = DATASETS[dataset]
+    row_filter = RowFilter({'status': ['Active', 'Completed', 'Planning']})
+    (memory, memory_total), (sqlite, sqlite_total) = (
+        loader.page(dataset, row_filter, None, True, search, 2, 30, RowLimit(40, mode)) for loader in loaders)
+    assert memory_total == sqlite_total
+    assert memory[id_column].tolist() == sqlite[id_column].tolist()
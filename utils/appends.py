@@ -0,0 +1,149 @@
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+import pandas as pd
+
+from config.settings import APPEND_CONFIG
+from utils.schema import normalize_frame
+
+
+def _complete_lines(path, start):
+    """Bytes of the whole lines of a file from offset ``start``, and the offset just past them.
+
+    The file is memory-mapped so only the tail is touched; a trailing line
+    still being written (no newline yet) is left for the next read.
+    """
+    with open(path, 'rb') as fh:
+        size = os.fstat(fh.fileno()).st_size
+        if size <= start:
+            return b'', start, size
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            end = mm.rfind(b'\n', start, size) + 1
+            if end <= start:
+                return b'', start, size
+            return mm[start:end], end, size
+
+
+def _read_bytes(path, start, length):
+    with open(path, 'rb') as fh:
+        fh.seek(start)
+        return fh.read(length)
+
+
+def _align_dtypes(frame, new):
+    """Match the new rows' dtypes to the frame's so concat keeps categories and types"""
+    for col in new.columns:
+        old = frame[col]
+        if isinstance(old.dtype, pd.CategoricalDtype):
+            added = new[col].cat.categories.difference(old.cat.categories)
+            if len(added):
+                frame[col] = old.cat.add_categories(added)
+        if new[col].dtype != frame[col].dtype:
+            try:
+                new[col] = new[col].astype(frame[col].dtype)
+            except (TypeError, ValueError):
+                if pd.api.types.is_integer_dtype(frame[col]) and pd.api.types.is_float_dtype(new[col]):
+                    # values outside a downcast integer dtype: widen both sides
+                    try:
+                        frame[col] = frame[col].astype('Int64')
+                        new[col] = new[col].astype('Int64')
+                    except (TypeError, ValueError):
+                        pass
+                # otherwise concat finds a common dtype
+    return frame, new
+
+
+class AppendTracker:
+    """Keeps CSV files parsed in memory and extends them with the rows appended since the last read.
+
+    For each file it remembers the byte offset parsed so far, the header, the
+    last bytes before the offset and the last id. When the file changes and
+    still starts with the same header and bytes, only the bytes after the
+    offset are parsed and concatenated; otherwise the file is read in full.
+    The row count at each recent file signature is kept so callers holding
+    results for an older version can fetch just the rows added since.
+    Frames are shared and must be treated as read-only.
+    """
+
+    _states = {}
+    _locks = {}
+    _guard = threading.Lock()
+
+    def __init__(self, verify_bytes=None, history=None):
+        self.verify_bytes = verify_bytes or APPEND_CONFIG['verify_bytes']
+        self.history = history or APPEND_CONFIG['history']
+
+    def _lock(self, path):
+        with self._guard:
+            return self._locks.setdefault(path, threading.Lock())
+
+    def state(self, path):
+        """Offset, rows and last id tracked for a file, or None if it was never read"""
+        state = self._states.get(path)
+        if state is None:
+            return None
+        return {'offset': state['offset'], 'rows': len(state['frame']), 'last_id': state['last_id']}
+
+    def read(self, path, spec, signature):
+        """The parsed file at ``signature`` (from file_signature), parsing only appended rows if possible"""
+        with self._lock(path):
+            state = self._states.get(path)
+            if state is not None and state['signature'] == signature:
+                return state['frame']
+            if state is None or not self._extend(path, spec, state):
+                state = self._read_full(path, spec)
+            state['signature'] = signature
+            state['rows_at'][signature] = len(state['frame'])
+            while len(state['rows_at']) > self.history:
+                state['rows_at'].popitem(last=False)
+            self._states[path] = state
+            return state['frame']
+
+    def appended_since(self, path, signature):
+        """Rows added after the file was at ``signature``, or None if that version is unknown or was rewritten"""
+        state = self._states.get(path)
+        if state is None or signature not in state['rows_at']:
+            return None
+        return state['frame'].iloc[state['rows_at'][signature]:]
+
+    def _read_full(self, path, spec):
+        data, offset, _ = _complete_lines(path, 0)
+        header = data.split(b'\n', 1)[0] + b'\n'
+        frame = normalize_frame(pd.read_csv(BytesIO(data)), spec)
+        return self._new_state(frame, spec, header, offset, data[-self.verify_bytes:], OrderedDict())
+
+    def _extend(self, path, spec, state):
+        """Parse the bytes appended since the last read into state; False if the file was not only appended to"""
+        header = state['header']
+        if _read_bytes(path, 0, len(header)) != header:
+            return False
+        offset, tail = state['offset'], state['tail']
+        if _read_bytes(path, offset - len(tail), len(tail)) != tail:
+            return False
+        data, end, _ = _complete_lines(path, offset)
+        if not data:
+            return True
+        frame = state['frame']
+        new = pd.read_csv(BytesIO(data), header=None, names=list(frame.columns))
+        new = normalize_frame(new, spec)
+        frame, new = _align_dtypes(frame.copy(deep=False), new)
+        frame = pd.concat([frame, new], ignore_index=True)
+        tail = (tail + data)[-self.verify_bytes:]
+        state.update(self._new_state(frame, spec, header, end, tail, state['rows_at']))
+        return True
+
+    @staticmethod
+    def _new_state(frame, spec, header, offset, tail, rows_at):
+        id_column = spec['id_column']
+        last_id = frame[id_column].dropna().iloc[-1] if id_column in frame.columns and frame[id_column].notna().any() else None
+        return {
+            'frame': frame,
+            'header': header,
+            'offset': offset,
+            'tail': tail,
+            'last_id': last_id,
+            'rows_at': rows_at,
+        }
@@ -1,11 +1,155 @@
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+import numpy as np
 import pandas as pd
 
+from config.settings import CHART_CONFIG
+from utils.data_loader import DatasetCache
+from utils.profiler import profiled
+
+# Module level so figures survive Streamlit reruns
+_figure_cache = DatasetCache(CHART_CONFIG['cache_entries'])
+
+# plotly is imported by the methods that build figures, so the dashboard starts
+# without it and a cached figure never needs it
+
+
+def palette(colors):
+    """Colour list for a plotly qualitative palette name such as 'Set3'; lists pass through"""
+    if isinstance(colors, str):
+        import plotly.express as px
+        return getattr(px.colors.qualitative, colors)
+    return colors
+
+
+def _colors_key(colors):
+    return colors if isinstance(colors, str) else tuple(colors or ())
+
+
+def fingerprint(data):
+    """Cheap content hash of the data behind a figure"""
+    if isinstance(data, (pd.DataFrame, pd.Series)):
+        columns = tuple(data.columns) if isinstance(data, pd.DataFrame) else data.name
+        hashed = pd.util.hash_pandas_object(data, index=True).to_numpy()
+        return (data.shape, columns, int(hashed.sum()))
+    return tuple(data)
+
+
 class ChartGenerator:
-    def __init__(self):
-        self.color_palette = px.colors.qualitative.Set3
+    def __init__(self, cache=None):
+        self.color_palette = 'Set3'
+        self.cache = cache if cache is not None else _figure_cache
+        self.max_points = CHART_CONFIG['max_points']
+
+    def _memoized(self, chart_id, data, params, build):
+        """Return the figure built for this data and these parameters, building it on first use.
+
+        Only the latest figure per chart_id is kept. Cached figures are shared
+        between reruns and must not be modified by callers.
+        """
+        key = (chart_id, fingerprint(data), params)
+        fig = self.cache.get(key)
+        if fig is None:
+            fig = build()
+            self.cache.put(key, fig)
+        return fig
+
+    @profiled()
+    def distribution_pie(self, counts, title, chart_id=None, colors=None):
+        """Pie chart of a value -> count Series; colors is a colour list or palette name"""
+        def build():
+            import plotly.express as px
+            return px.pie(values=counts.values, names=counts.index.astype(str), title=title, color_discrete_sequence=palette(colors))
+        return self._memoized(chart_id or title, counts, ('pie', title, _colors_key(colors)), build)
+
+    @profiled()
+    def distribution_bar(self, counts, title, chart_id=None, color_by_value=True, color_scale=None, colors=None):
+        """Bar chart of a value -> count Series, coloured by count or, with color_by_value=False, by category"""
+        def build():
+            import plotly.express as px
+            names = counts.index.astype(str)
+            color = counts.values if color_by_value else list(names)
+            return px.bar(x=names, y=counts.values, title=title, color=color,
+                          color_continuous_scale=color_scale, color_discrete_sequence=palette(colors))
+        params = ('bar', title, color_by_value, color_scale, _colors_key(colors))
+        return self._memoized(chart_id or title, counts, params, build)
+
+    @profiled()
+    def category_bar(self, data, x, y, title, chart_id=None, color_scale='Viridis'):
+        """Bar per row of data; above max_points rows, one bar per x value with the mean of y"""
+        def build():
+            import plotly.express as px
+            frame = data[[x, y]]
+            if len(frame) > self.max_points:
+                frame = self._category_means(frame, x, y)
+            fig = px.bar(frame, x=x, y=y, title=title, color=y, color_continuous_scale=color_scale)
+            fig.update_layout(xaxis=dict(tickangle=45))
+            return fig
+        return self._memoized(chart_id or title, data[[x, y]], ('category_bar', x, y, title, color_scale), build)
+
+    @profiled()
+    def scatter(self, data, x, y, title, chart_id=None, color=None, size=None):
+        """Scatter plot; above max_points rows the points are binned server-side into a count heatmap"""
+        columns = [c for c in dict.fromkeys([x, y, color, size]) if c is not None]
+        def build():
+            import plotly.express as px
+            if len(data) > self.max_points:
+                return self._binned_heatmap(data, x, y, f"{title} (binned)")
+            return px.scatter(data, x=x, y=y, title=title, color=color, size=size)
+        return self._memoized(chart_id or title, data[columns], ('scatter', x, y, title, color, size), build)
+
+    def _category_means(self, data, x, y):
+        """Mean of y per x value; beyond max_points values, the most frequent ones and an 'Other' bar for the rest"""
+        grouped = data.groupby(x, observed=True)[y].agg(['sum', 'count', 'size'])
+        if len(grouped) > self.max_points:
+            grouped = grouped.sort_values('size', ascending=False, kind='stable')
+            rest = grouped.iloc[self.max_points - 1:].sum().rename('Other')
+            grouped = pd.concat([grouped.iloc[:self.max_points - 1], rest.to_frame().T])
+        means = grouped['sum'] / grouped['count'].where(grouped['count'] > 0)
+        return pd.DataFrame({x: grouped.index.astype(str), y: means.to_numpy()})
+
+    def _binned_heatmap(self, data, x, y, title):
+        """Counts per 2D bin, so the figure carries bins x bins values instead of every point"""
+        import plotly.graph_objects as go
+        points = data[[x, y]].dropna()
+        counts, x_edges, y_edges = np.histogram2d(points[x].to_numpy(dtype=float), points[y].to_numpy(dtype=float), bins=CHART_CONFIG['scatter_bins'])
+        fig = go.Figure(go.Heatmap(
+            z=np.where(counts.T > 0, counts.T, np.nan),
+            x=(x_edges[:-1] + x_edges[1:]) / 2,
+            y=(y_edges[:-1] + y_edges[1:]) / 2,
+            colorscale='Blues',
+            colorbar=dict(title='count')
+        ))
+        fig.update_layout(title=title, xaxis_title=x, yaxis_title=y)
+        return fig
+
+    @profiled()
+    def timeline(self, data, x_start, x_end, y, title, chart_id=None, color=None):
+        """Gantt-style timeline of row intervals; above max_points rows only the latest-starting ones are drawn"""
+        columns = [c for c in dict.fromkeys([x_start, x_end, y, color]) if c is not None]
+        def build():
+            import plotly.express as px
+            frame, shown_title = data[columns], title
+            if len(frame) > self.max_points:
+                frame = frame.sort_values(x_start, ascending=False, kind='stable', na_position='last').head(self.max_points)
+                shown_title = f"{title} (latest {self.max_points})"
+            return px.timeline(frame, x_start=x_start, x_end=x_end, y=y, title=shown_title, color=color)
+        return self._memoized(chart_id or title, data[columns], ('timeline', x_start, x_end, y, title, color), build)
+
+    @profiled()
+    def sparkline(self, values, title):
+        """Small trend line shown under a KPI"""
+        def build():
+            import plotly.graph_objects as go
+            fig = go.Figure()
+            fig.add_trace(go.Scatter(y=list(values), mode='lines+markers', line=dict(color="#1f77b4"), marker=dict(size=6)))
+            fig.update_layout(
+                height=100,
+                margin=dict(l=10, r=10, t=20, b=10),
+                xaxis=dict(visible=False),
+                yaxis=dict(visible=False),
+                title=dict(text=title, x=0.01, xanchor='left', yanchor='top', font=dict(size=10))
+            )
+            return fig
+        return self._memoized(f"sparkline:{title}", values, ('sparkline', title), build)
     
     def create_kpi_chart(self, value, title, delta=None, format_func=None):
         """Create a KPI metric chart"""
@@ -22,6 +166,7 @@ class ChartGenerator:
     
     def create_progress_bar(self, current, target, title):
         """Create a progress bar chart"""
+        import plotly.graph_objects as go
         percentage = (current / target) * 100
         
         fig = go.Figure(go.Indicator(
@@ -49,6 +194,7 @@ class ChartGenerator:
     
     def create_trend_chart(self, data, x_col, y_col, title):
         """Create a trend line chart"""
+        import plotly.express as px
         fig = px.line(data, x=x_col, y=y_col, title=title)
         fig.update_traces(line_color='#1f77b4', line_width=3)
         fig.update_layout(
@@ -59,6 +205,7 @@ class ChartGenerator:
     
     def create_comparison_chart(self, data, categories, values, title):
         """Create a comparison bar chart"""
+        import plotly.express as px
         fig = px.bar(
             x=categories, y=values, title=title,
             color=values, color_continuous_scale='Viridis'
@@ -0,0 +1,112 @@
+import pandas as pd
+
+from config.settings import CACHE_CONFIG, CUBE_CONFIG, DATASETS
+from utils.data_loader import DatasetCache
+from utils.profiler import profiled
+
+LEVELS = CUBE_CONFIG['levels']
+MEASURES = ['records', 'value']
+
+# Module level so base cuboids and their rollups survive Streamlit reruns and are shared by sessions
+_cuboid_cache = DatasetCache(CACHE_CONFIG['max_entries'])
+_rollup_cache = DatasetCache(CUBE_CONFIG['cache_entries'])
+
+
+def _labels(series):
+    """Dimension values as strings, with missing ones labelled 'Unknown'"""
+    return series.astype(object).where(series.notna(), 'Unknown').astype(str)
+
+
+class KPICube:
+    """Cross-department roll-ups over department -> status -> category -> month.
+
+    Each dataset is reduced once per data version and filter to its base
+    cuboid: record count and value sum per department, status, category
+    (technology, position, consulting area or service type) and month. The
+    department is the record's own ``department`` column where the dataset
+    has one (HR staff work in every department), otherwise the department
+    the dataset belongs to. Values are in each dataset's own measure
+    (CUBE_CONFIG 'value'), so only values of one dataset add up meaningfully. The base cuboids
+    are stacked and rolled up along every prefix of the hierarchy, so
+    drill-down queries only slice these small tables instead of raw rows.
+    """
+
+    def __init__(self, data_loader, cache=None, rollup_cache=None):
+        self.data_loader = data_loader
+        self.cache = cache if cache is not None else _cuboid_cache
+        self.rollup_cache = rollup_cache if rollup_cache is not None else _rollup_cache
+
+    def base(self, dataset, row_filter=None):
+        """Base cuboid of one dataset: one row per (department, status, category, month)"""
+        filter_key = row_filter.key() if row_filter is not None else ()
+        key = self.data_loader.source_version(dataset) + ('cuboid', dataset, filter_key)
+        cuboid = self.cache.get(key)
+        if cuboid is None:
+            cuboid = self._base(dataset, row_filter)
+            self.cache.put(key, cuboid)
+        return cuboid
+
+    def _base(self, dataset, row_filter):
+        dims = CUBE_CONFIG['datasets'][dataset]
+        period_column = DATASETS[dataset]['period_columns'][0]
+        columns = ['department', 'status', dims['category'], dims['value'], period_column]
+        df = self.data_loader.load(dataset, row_filter, columns=columns)
+        frame = pd.DataFrame({
+            'department': _labels(df['department']) if 'department' in df.columns else dims['department'],
+            'status': _labels(df['status']) if 'status' in df.columns else 'Unknown',
+            'category': _labels(df[dims['category']]) if dims['category'] in df.columns else 'Unknown',
+            'month': df[period_column].dt.to_period('M') if period_column in df.columns else pd.NaT,
+            'records': 1,
+            'value': df[dims['value']].fillna(0).astype('int64') if dims['value'] in df.columns else 0,
+        }, index=df.index)
+        return frame.groupby(LEVELS, dropna=False, sort=False)[MEASURES].sum().reset_index()
+
+    def rollups(self, row_filter=None, datasets=None):
+        """{levels: aggregate} for every prefix of the hierarchy, from the datasets' base cuboids"""
+        datasets = list(datasets or CUBE_CONFIG['datasets'])
+        cuboids, versions = [], []
+        for name in datasets:
+            try:
+                version = self.data_loader.source_version(name)
+                cuboids.append(self.base(name, row_filter))
+            except FileNotFoundError:
+                continue
+            versions.append(version)
+        # keyed like the other caches, with the datasets' versions in place of a file signature
+        key = (tuple(datasets), tuple(versions), 'rollups', row_filter.key() if row_filter is not None else ())
+        rollups = self.rollup_cache.get(key)
+        if rollups is not None:
+            return rollups
+        base = pd.concat(cuboids, ignore_index=True) if cuboids else pd.DataFrame(columns=LEVELS + MEASURES)
+        rollups = {tuple(LEVELS): base}
+        for depth in range(len(LEVELS) - 1, 0, -1):
+            levels = LEVELS[:depth]
+            finer = rollups[tuple(LEVELS[:depth + 1])]
+            rollups[tuple(levels)] = finer.groupby(levels, dropna=False, sort=False)[MEASURES].sum().reset_index()
+        self.rollup_cache.put(key, rollups)
+        return rollups
+
+    @profiled()
+    def query(self, by, where=None, row_filter=None, datasets=None):
+        """Records and value per combination of the ``by`` levels, for rows matching ``where``.
+
+        ``where`` maps levels to a value or list of values, e.g.
+        {'department': 'IT Solutions', 'status': 'Active'}. The answer is read
+        from the coarsest precomputed rollup holding all the levels involved.
+        """
+        where = where or {}
+        needed = list(by) + list(where)
+        unknown = [level for level in needed if level not in LEVELS]
+        if unknown:
+            raise ValueError(f"Unknown cube levels: {unknown}")
+        depth = max((LEVELS.index(level) + 1 for level in needed), default=1)
+        table = self.rollups(row_filter, datasets)[tuple(LEVELS[:depth])]
+        for level, values in where.items():
+            values = values if isinstance(values, (list, tuple, set)) else [values]
+            table = table[table[level].isin(values)]
+        if not by:
+            return table[MEASURES].sum().to_frame().T
+        result = table.groupby(list(by), dropna=False, sort=False)[MEASURES].sum().reset_index()
+        if list(by) == ['month']:
+            return result.dropna(subset=['month']).sort_values('month', ignore_index=True)
+        return result.sort_values('records', ascending=False, kind='stable', ignore_index=True)
@@ -1,34 +1,588 @@
+import contextvars
+import numpy as np
 import pandas as pd
 import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from config.settings import (APPEND_CONFIG, CACHE_CONFIG, CSV_CHUNKSIZE, DATA_BACKEND, DATASETS, LOADER_CONFIG,
+                             PARTITION_CONFIG, SNAPSHOT_CONFIG)
+from utils.appends import AppendTracker
+from utils.filters import RowLimit
+from utils.partitions import PartitionedDataset, concat_partitions, partition_dir
+from utils.profiler import profiled
+from utils.schema import normalize_frame
+from utils.snapshots import SnapshotStore
+from utils.sqlite_store import SQLiteStore
+
+
+# Lease of the session whose rerun is executing in the current context, if any
+_lease = contextvars.ContextVar('solochoicez_cache_lease', default=None)
+
+
+class DatasetCache:
+    """Bounded LRU of parsed DataFrames keyed by file path plus mtime/size.
+
+    Keys are tuples whose first two items are the file path and its
+    signature; storing a new signature for a path drops the stale entries.
+    State carried from one data version to the next (e.g. KPI partials that
+    are extended with appended rows) is kept in its own cache with a
+    constant in place of the signature and the version inside the value.
+    Cached frames are shared between reruns and sessions and must be treated
+    as read-only. Entries held by a CacheLease are reference counted and
+    skipped by LRU eviction until every session showing them moves on, so
+    the cache may briefly exceed ``max_entries``.
+    """
+
+    def __init__(self, max_entries=8):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._refs = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self._hold(key)
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            path, signature = key[0], key[1]
+            stale = [k for k in self._entries if k[0] == path and k[1] != signature]
+            for k in stale:
+                del self._entries[k]
+                self._refs.pop(k, None)
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            self._hold(key)
+            self._trim()
+
+    def _hold(self, key):
+        lease = _lease.get()
+        if lease is not None and lease.hold(self, key):
+            self._refs[key] = self._refs.get(key, 0) + 1
+
+    def release(self, key):
+        """Drop one lease's reference to an entry, evicting it if the cache is over size"""
+        with self._lock:
+            count = self._refs.get(key, 0) - 1
+            if count > 0:
+                self._refs[key] = count
+            else:
+                self._refs.pop(key, None)
+            self._trim()
+
+    def _trim(self):
+        if len(self._entries) <= self.max_entries:
+            return
+        for k in [k for k in self._entries if k not in self._refs]:
+            del self._entries[k]
+            if len(self._entries) <= self.max_entries:
+                break
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._refs.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'pinned': len(self._refs),
+                'max_entries': self.max_entries,
+            }
+
+
+class CacheLease:
+    """References from one session to the shared cache entries it is showing.
+
+    Entries a rerun reads or stores (in any DatasetCache) are held until a
+    later rerun of the same session no longer uses them, or until the lease
+    is garbage collected with the session's state. Keep one per session,
+    e.g. in ``st.session_state``, and wrap each rerun in ``rerun()``.
+
+    A partial rerun (an ``st.fragment`` rerunning on its own) passes a
+    ``scope``: it replaces only what that scope used last time, and entries
+    still used by the rest of the page stay held until the next full rerun.
+    """
+
+    def __init__(self):
+        self._held = set()
+        self._used = {}
+        self._scope = None
+        self._lock = threading.Lock()
+        weakref.finalize(self, CacheLease._release, self._held)
+
+    @staticmethod
+    def current():
+        """The lease of the rerun executing in this context, or None outside a rerun"""
+        return _lease.get()
+
+    def hold(self, cache, key):
+        """Record that the current rerun uses an entry; True if it was not held yet"""
+        with self._lock:
+            self._used.setdefault(self._scope, set()).add((cache, key))
+            if (cache, key) in self._held:
+                return False
+            self._held.add((cache, key))
+            return True
+
+    @contextmanager
+    def rerun(self, scope=None):
+        with self._lock:
+            if scope is None:
+                self._used = {}
+            self._used[scope] = set()
+            self._scope = scope
+        token = _lease.set(self)
+        try:
+            yield self
+        finally:
+            _lease.reset(token)
+            with self._lock:
+                self._scope = None
+                done = self._held.difference(*self._used.values())
+                self._held -= done
+            CacheLease._release(done)
+
+    @property
+    def held(self):
+        return len(self._held)
+
+    @staticmethod
+    def _release(entries):
+        for cache, key in list(entries):
+            cache.release(key)
+        entries.clear()
+
+
+# Module level so the cache survives Streamlit reruns, which rebuild DataLoader
+_dataset_cache = DatasetCache(CACHE_CONFIG['max_entries'])
+# Parsed partitions of partitioned datasets, kept apart so they don't crowd out filtered results
+_partition_cache = DatasetCache(PARTITION_CONFIG['cache_entries'])
+
+
+def file_signature(path):
+    """Return (mtime_ns, size) for a file; raises FileNotFoundError if missing."""
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _aggregate_frame(df, aggregates, group_by=None):
+    """Pandas equivalent of SQLiteStore.aggregate"""
+    specs = {alias: (func, col) for alias, (func, col) in aggregates.items() if col == '*' or col in df.columns}
+    if group_by is not None:
+        if group_by not in df.columns:
+            return pd.DataFrame(columns=[group_by] + list(aggregates))
+        grouped = df.groupby(group_by, observed=True, sort=False)
+        result = pd.DataFrame({
+            alias: grouped.size() if col == '*' else grouped[col].agg(func)
+            for alias, (func, col) in specs.items()
+        })
+        if specs:
+            result = result.sort_values(next(iter(specs)), ascending=False)
+        return result.rename_axis(group_by).reset_index()
+    row = {alias: len(df) if col == '*' else df[col].agg(func) for alias, (func, col) in specs.items()}
+    return pd.DataFrame([row])
+
+
+def row_order(df, sort_by=None, ascending=True, search=None, base=None):
+    """Positions of the rows of df matching search, in sort order (missing values last).
+
+    ``base`` is the order rows keep when there is no sort column (file order by default).
+    """
+    positions = np.arange(len(df)) if base is None else base
+    if search:
+        matches = np.zeros(len(df), dtype=bool)
+        for col in df.columns:
+            series = df[col]
+            if pd.api.types.is_string_dtype(series) or isinstance(series.dtype, pd.CategoricalDtype) or series.dtype == object:
+                matches |= series.astype(str).str.contains(search, case=False, regex=False, na=False).to_numpy()
+        positions = positions[matches[positions]]
+    if sort_by in df.columns:
+        keys = df[sort_by].iloc[positions].reset_index(drop=True)
+        if isinstance(keys.dtype, pd.CategoricalDtype):
+            keys = keys.cat.reorder_categories(sorted(keys.cat.categories), ordered=True)
+        positions = positions[keys.sort_values(ascending=ascending, kind='stable', na_position='last').index.to_numpy()]
+    return positions
+
+
+def page_frame(df, positions, page=1, page_size=100):
+    """Rows of page ``page`` (1-based) out of an ordering from row_order"""
+    start = (max(page, 1) - 1) * page_size
+    return df.iloc[positions[start:start + page_size]]
+
 
 class DataLoader:
-    def __init__(self, data_path="data/"):
+    def __init__(self, data_path="data/", cache=None, backend=None):
         self.data_path = data_path
+        self.cache = cache if cache is not None else _dataset_cache
+        self.backend = backend or DATA_BACKEND
+        self.store = None
+        if self.backend == 'sqlite':
+            store = SQLiteStore()
+            if store.exists():
+                self.store = store
+            else:
+                print(f"Database {store.path} not found; run `python -m utils.sqlite_store ingest`. Using CSV files.")
+        self.appends = None
+        if self.store is None and APPEND_CONFIG['enabled']:
+            self.appends = AppendTracker()
+        self.snapshots = None
+        if self.store is None and self.appends is None and SNAPSHOT_CONFIG['enabled'] and SnapshotStore.available():
+            self.snapshots = SnapshotStore(data_path=self.data_path)
+
+    def _partitions(self, dataset):
+        """The dataset's PartitionedDataset if it is stored as a non-empty directory of partitions, else None"""
+        directory = os.path.abspath(partition_dir(self.data_path, dataset))
+        return PartitionedDataset.open(directory, dataset)
+
+    def _partition(self, partitions, entry):
+        """One parsed partition (a manifest entry), shared through the partition cache"""
+        part_key = (os.path.join(partitions.directory, entry['file']), tuple(entry['signature']))
+        frame = _partition_cache.get(part_key)
+        if frame is None:
+            frame = partitions.read_partition(entry)
+            _partition_cache.put(part_key, frame)
+        return frame
+
+    def _read_partitions(self, dataset, partitions, row_filter=None):
+        """Matching rows of a partitioned dataset, reading only partitions that overlap the date range"""
+        spec = DATASETS[dataset]
+        entries = partitions.manifest()
+        if not entries:
+            raise FileNotFoundError(f"No partitions in {partitions.directory}")
+        filter_key = row_filter.key() if row_filter is not None else ()
+        key = (partitions.directory, PartitionedDataset.version(entries), 'partitions', filter_key)
+        df = self.cache.get(key)
+        if df is None:
+            frames = []
+            for entry in partitions.prune(entries, row_filter):
+                frame = self._partition(partitions, entry)
+                frames.append(row_filter.apply(frame, spec) if row_filter is not None else frame)
+            if not frames:
+                frames = [partitions.read_partition(entries[0]).iloc[:0]]
+            df = concat_partitions(frames, spec)
+            self.cache.put(key, df)
+        return df
+
+    def _read_csv(self, dataset):
+        """Return the parsed CSV, re-reading it only when the file changed.
+
+        With append-only ingestion, a file that only grew has just its new
+        rows parsed (see utils/appends.py).
+        """
+        spec = DATASETS[dataset]
+        path = os.path.abspath(os.path.join(self.data_path, spec['file']))
+        if self.appends is not None:
+            return self.appends.read(path, spec, file_signature(path))
+        key = (path, file_signature(path))
+        df = self.cache.get(key)
+        if df is None:
+            df = normalize_frame(pd.read_csv(path), spec)
+            self.cache.put(key, df)
+        return df
+
+    def _read_snapshot(self, dataset, row_filter=None, columns=None):
+        """Read the requested columns and matching rows from the dataset's Parquet snapshot"""
+        spec = DATASETS[dataset]
+        path = os.path.abspath(os.path.join(self.data_path, spec['file']))
+        signature = file_signature(path)
+        filter_key = row_filter.key() if row_filter is not None else ()
+        key = (path, signature, 'snapshot', filter_key, tuple(columns or ()))
+        df = self.cache.get(key)
+        if df is None:
+            try:
+                df = self.snapshots.read(dataset, path, signature, columns=columns, row_filter=row_filter)
+            except (OSError, ValueError) as exc:
+                print(f"Could not use snapshot for {dataset} ({exc}); reading CSV.")
+                df = self._read_csv(dataset)
+                if row_filter is not None:
+                    df = row_filter.apply(df, spec)
+            self.cache.put(key, df)
+        return df
+
+    def _read_csv_filtered(self, dataset, row_filter):
+        """Return only the rows of a dataset's CSV that match row_filter.
+
+        Reuses the full frame if it is already cached; otherwise the file is
+        read in chunks and each chunk is filtered before it is kept, so the
+        non-matching rows are never accumulated.
+        """
+        spec = DATASETS[dataset]
+        path = os.path.abspath(os.path.join(self.data_path, spec['file']))
+        signature = file_signature(path)
+        if self.appends is not None or (path, signature) in self.cache:
+            return row_filter.apply(self._read_csv(dataset), spec)
+        key = (path, signature, 'filtered', row_filter.key())
+        df = self.cache.get(key)
+        if df is None:
+            chunks = [row_filter.apply(chunk, spec) for chunk in pd.read_csv(path, chunksize=CSV_CHUNKSIZE)]
+            df = pd.concat(chunks, ignore_index=True) if chunks else pd.read_csv(path, nrows=0)
+            df = normalize_frame(df, spec)
+            self.cache.put(key, df)
+        return df
+
+    def _store_key(self, *parts):
+        path = os.path.abspath(self.store.path)
+        return (path, file_signature(path)) + parts
+
+    @profiled()
+    def load(self, dataset, row_filter=None, columns=None, limit=None):
+        """Load a dataset with filters, column selection and row limit applied by the backend.
+
+        ``limit`` is a RowLimit, or a row count limited with the default mode.
+        """
+        filter_key = row_filter.key() if row_filter is not None else ()
+        if limit is not None and not isinstance(limit, RowLimit):
+            limit = RowLimit(limit)
+        if self.store is not None:
+            key = self._store_key('rows', dataset, filter_key, tuple(columns or ()), limit.key() if limit else None)
+            df = self.cache.get(key)
+            if df is None:
+                df = self.store.query(dataset, columns, row_filter, limit)
+                self.cache.put(key, df)
+            return df
+        spec = DATASETS[dataset]
+        read_columns = columns
+        if columns and limit is not None:
+            read_columns = list(dict.fromkeys(list(columns) + limit.columns(spec)))
+        partitions = self._partitions(dataset)
+        if partitions is not None:
+            df = self._read_partitions(dataset, partitions, row_filter)
+        elif self.snapshots is not None:
+            df = self._read_snapshot(dataset, row_filter, read_columns)
+        elif row_filter is None or row_filter.is_empty():
+            df = self._read_csv(dataset)
+        else:
+            df = self._read_csv_filtered(dataset, row_filter)
+        if limit is not None:
+            df = df.iloc[limit.select(self._limit_order(dataset, df, filter_key, limit))]
+        if columns:
+            df = df[[c for c in columns if c in df.columns]]
+        return df
+
+    def _limit_order(self, dataset, df, filter_key, limit):
+        """RowLimit.order of the filtered dataset df, cached per data version, filter and mode"""
+        # the ordering depends only on the rows, so it is shared by every n and column selection
+        key = self.source_version(dataset) + ('limit', dataset, filter_key, limit.order_key())
+        order = self.cache.get(key)
+        if order is None:
+            order = limit.order(df, DATASETS[dataset])
+            self.cache.put(key, order)
+        return order
+
+    @profiled()
+    def load_many(self, datasets, row_filter=None, columns=None, limit=None, max_workers=None):
+        """Load several datasets concurrently with the same filter, columns and limit.
+
+        Returns (frames, timings): dicts keyed by dataset name holding the
+        loaded DataFrame (None if its file is missing) and the seconds it took.
+        """
+        def timed_load(dataset):
+            started = time.perf_counter()
+            try:
+                df = self.load(dataset, row_filter, columns, limit)
+            except FileNotFoundError:
+                print(f"File not found for {dataset}. Please check the file path and try again.")
+                df = None
+            return df, time.perf_counter() - started
+
+        workers = min(max_workers or LOADER_CONFIG['max_workers'], len(datasets)) or 1
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # each worker runs in a copy of the caller's context so profiling stages reach its profiler
+            futures = [pool.submit(contextvars.copy_context().run, timed_load, name) for name in datasets]
+            results = dict(zip(datasets, (future.result() for future in futures)))
+        frames = {name: df for name, (df, _) in results.items()}
+        timings = {name: seconds for name, (_, seconds) in results.items()}
+        return frames, timings
+
+    @profiled()
+    def aggregate(self, dataset, aggregates, group_by=None, row_filter=None):
+        """Compute aggregates over the filtered dataset, in SQL when the SQLite backend is active.
+
+        ``aggregates`` maps an output name to a (function, column) pair; see
+        SQLiteStore.aggregate. Returns one row, or one row per group.
+        """
+        if self.store is not None:
+            filter_key = row_filter.key() if row_filter is not None else ()
+            key = self._store_key('aggregate', dataset, tuple(aggregates.items()), group_by, filter_key)
+            result = self.cache.get(key)
+            if result is None:
+                result = self.store.aggregate(dataset, aggregates, group_by, row_filter)
+                self.cache.put(key, result)
+            return result
+        columns = [col for _, col in aggregates.values() if col != '*']
+        if group_by is not None:
+            columns.append(group_by)
+        columns = list(dict.fromkeys(columns)) or [DATASETS[dataset]['id_column']]
+        return _aggregate_frame(self.load(dataset, row_filter, columns=columns), aggregates, group_by)
+
+    @profiled()
+    def summarize(self, dataset, aggregates, count_columns=(), row_filter=None):
+        """Compute single-row aggregates and per-value row counts of several columns together.
+
+        Returns (totals, counts): a dict of aggregate values (missing columns
+        left out) and a dict mapping each count column to a Series of counts,
+        largest first. In memory this is one load of the needed columns; with
+        SQLite, one aggregate query plus one GROUP BY per count column.
+        """
+        if self.store is not None:
+            result = self.aggregate(dataset, aggregates, row_filter=row_filter)
+            totals = result.to_dict('records')[0] if not result.empty else {}
+            counts = {}
+            for col in count_columns:
+                grouped = self.aggregate(dataset, {'count': ('count', '*')}, group_by=col, row_filter=row_filter)
+                counts[col] = grouped.set_index(col)['count']
+            return totals, counts
+        columns = [col for _, col in aggregates.values() if col != '*'] + list(count_columns)
+        columns = list(dict.fromkeys(columns)) or [DATASETS[dataset]['id_column']]
+        df = self.load(dataset, row_filter, columns=columns)
+        result = _aggregate_frame(df, aggregates)
+        totals = result.to_dict('records')[0] if not result.empty else {}
+        counts = {}
+        for col in count_columns:
+            if col in df.columns:
+                values = df[col].value_counts()
+                counts[col] = values[values > 0]
+            else:
+                counts[col] = pd.Series(dtype='int64')
+        return totals, counts
+
+    @profiled()
+    def page(self, dataset, row_filter=None, sort_by=None, ascending=True, search=None, page=1, page_size=100, limit=None):
+        """Return (rows, total) for one page of the filtered dataset, sorted and searched server-side.
+
+        Without ``sort_by``, rows follow the RowLimit ``limit`` if given: the
+        rows it limits the dataset to come first (see RowLimit.ranking), then
+        the others. With SQLite this is a COUNT plus an ORDER BY ...
+        LIMIT/OFFSET query; in memory the row ordering is cached per data
+        version, filter, sort, search and limit, so turning pages only slices it.
+        """
+        filter_key = row_filter.key() if row_filter is not None else ()
+        offset = (max(page, 1) - 1) * page_size
+        limit_key = limit.key() if limit is not None and sort_by is None else None
+        if self.store is not None:
+            key = self._store_key('page', dataset, filter_key, sort_by, ascending, search, limit_key, offset, page_size)
+            result = self.cache.get(key)
+            if result is None:
+                result = self.store.page(dataset, row_filter, sort_by, ascending, search, offset, page_size,
+                                         limit if limit_key else None)
+                self.cache.put(key, result)
+            return result
+        df = self.load(dataset, row_filter)
+        key = self.source_version(dataset) + ('order', dataset, filter_key, sort_by, ascending, search, limit_key)
+        positions = self.cache.get(key)
+        if positions is None:
+            base = limit.ranking(self._limit_order(dataset, df, filter_key, limit)) if limit_key else None
+            positions = row_order(df, sort_by, ascending, search, base)
+            self.cache.put(key, positions)
+        return page_frame(df, positions, page, page_size), len(positions)
+
+    def appended(self, dataset, version, row_filter=None, columns=None):
+        """Rows appended to a dataset since ``version`` (from source_version), filtered.
+
+        Returns None unless append-only ingestion tracks the file and it has
+        only grown since that version; callers then recompute from a full load.
+        """
+        if self.appends is None or self._partitions(dataset) is not None:
+            return None
+        spec = DATASETS[dataset]
+        path, signature = version
+        self._read_csv(dataset)
+        df = self.appends.appended_since(path, signature)
+        if df is None:
+            return None
+        if row_filter is not None:
+            df = row_filter.apply(df, spec)
+        if columns:
+            df = df[[c for c in columns if c in df.columns]]
+        return df
+
+    def source_version(self, dataset):
+        """(path, signature) of the file or partition directory a dataset is currently read from"""
+        partitions = self._partitions(dataset) if self.store is None else None
+        if partitions is not None:
+            return (partitions.directory, PartitionedDataset.version(partitions.manifest()))
+        if self.store is not None:
+            path = os.path.abspath(self.store.path)
+        else:
+            path = os.path.abspath(os.path.join(self.data_path, DATASETS[dataset]['file']))
+        return (path, file_signature(path))
+
+    def memory_report(self, datasets=None):
+        """Bytes each dataset takes as read by pandas with default dtypes versus the compact frame loaded here"""
+        rows = []
+        for name in datasets or DATASETS:
+            try:
+                compact = self.load(name)
+                partitions = self._partitions(name)
+                if partitions is not None:
+                    paths = [os.path.join(partitions.directory, entry['file']) for entry in partitions.manifest()]
+                else:
+                    paths = [os.path.join(self.data_path, DATASETS[name]['file'])]
+                default_bytes = sum(int(pd.read_csv(path).memory_usage(deep=True).sum()) for path in paths)
+            except FileNotFoundError:
+                continue
+            compact_bytes = int(compact.memory_usage(deep=True).sum())
+            rows.append({
+                'dataset': name,
+                'rows': len(compact),
+                'default_bytes': default_bytes,
+                'compact_bytes': compact_bytes,
+                'saved_bytes': default_bytes - compact_bytes,
+                'ratio': default_bytes / compact_bytes if compact_bytes else None,
+            })
+        return pd.DataFrame(rows, columns=['dataset', 'rows', 'default_bytes', 'compact_bytes', 'saved_bytes', 'ratio'])
+
+    def cache_stats(self):
+        """Hit/miss counters of the dataset cache"""
+        return self.cache.stats()
 
     def load_it_solutions_data(self):
         """Load IT solutions data"""
         try:
-            return pd.read_csv(os.path.join(self.data_path, "it_solutions.csv"))
+            return self.load("it_solutions")
         except FileNotFoundError:
             print("File not found. Please check the file path and try again.")
 
     def load_hr_staffing_data(self):
         """Load HR staffing data"""
         try:
-            return pd.read_csv(os.path.join(self.data_path, "hr_staffing.csv"))
+            return self.load("hr_staffing")
         except FileNotFoundError:
             print("File not found. Please check the file path and try again.")
 
     def load_consulting_data(self):
         """Load business consulting data"""
         try:
-            return pd.read_csv(os.path.join(self.data_path, "business_consulting.csv"))
+            return self.load("business_consulting")
         except FileNotFoundError:
             print("File not found. Please check the file path and try again.")
 
     def load_ai_services_data(self):
         """Load AI services data"""
         try:
-            return pd.read_csv(os.path.join(self.data_path, "data_ai_services.csv"))
+            return self.load("data_ai_services")
         except FileNotFoundError:
             print("File not found. Please check the file path and try again.")
\ No newline at end of file
@@ -0,0 +1,82 @@
+import importlib.util
+from io import BytesIO
+
+from config.settings import EXPORT_CONFIG
+from utils.data_loader import DatasetCache
+from utils.profiler import profiled
+
+EXPORT_FORMATS = {
+    'csv': {'label': "📥 Download CSV", 'mime': "text/csv", 'module': None},
+    'xlsx': {'label': "📥 Download Excel", 'mime': "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", 'module': 'xlsxwriter'},
+    'parquet': {'label': "📥 Download Parquet", 'mime': "application/vnd.apache.parquet", 'module': 'pyarrow'},
+}
+
+# Excel sheets hold 1,048,576 rows including the header
+EXCEL_MAX_ROWS = 1048575
+
+# Module level so generated files survive Streamlit reruns
+_export_cache = DatasetCache(EXPORT_CONFIG['cache_entries'])
+
+
+def available_formats(df):
+    """Export formats whose writer is installed and that can hold df"""
+    formats = []
+    for fmt, spec in EXPORT_FORMATS.items():
+        if spec['module'] and importlib.util.find_spec(spec['module']) is None:
+            continue
+        if fmt == 'xlsx' and len(df) > EXCEL_MAX_ROWS:
+            continue
+        formats.append(fmt)
+    return formats
+
+
+def write_csv(df, output, chunksize=None):
+    """Write df as CSV to a binary file object chunk by chunk, so only one chunk is held as text at a time"""
+    chunksize = chunksize or EXPORT_CONFIG['csv_chunksize']
+    for start in range(0, max(len(df), 1), chunksize):
+        chunk = df.iloc[start:start + chunksize]
+        output.write(chunk.to_csv(index=False, header=(start == 0)).encode('utf-8'))
+
+
+def to_csv_bytes(df, chunksize=None):
+    """The whole CSV file as bytes, as download buttons need; use write_csv to stream to a file"""
+    output = BytesIO()
+    write_csv(df, output, chunksize)
+    return output.getvalue()
+
+
+def to_excel_bytes(df):
+    """Return Excel file as bytes; xlsxwriter streams rows in constant-memory mode."""
+    import pandas as pd
+
+    output = BytesIO()
+    with pd.ExcelWriter(output, engine='xlsxwriter', engine_kwargs={'options': {'constant_memory': True}}) as writer:
+        df.to_excel(writer, index=False, sheet_name='Sheet1')
+    return output.getvalue()
+
+
+def to_parquet_bytes(df):
+    output = BytesIO()
+    df.to_parquet(output, index=False)
+    return output.getvalue()
+
+
+WRITERS = {'csv': to_csv_bytes, 'xlsx': to_excel_bytes, 'parquet': to_parquet_bytes}
+
+
+@profiled()
+def export_bytes(df, fmt, name, version=None):
+    """Serialize df to fmt, reusing the file generated earlier for the same name and version.
+
+    ``version`` identifies the data behind df (dataset versions plus filter
+    state); without it nothing is cached. A new version replaces the files
+    cached for that name.
+    """
+    if version is None:
+        return WRITERS[fmt](df)
+    key = (name, version, fmt)
+    data = _export_cache.get(key)
+    if data is None:
+        data = WRITERS[fmt](df)
+        _export_cache.put(key, data)
+    return data
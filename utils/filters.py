@@ -0,0 +1,191 @@
+import numpy as np
+import pandas as pd
+
+from config.settings import DEPARTMENTS, LIMIT_CONFIG
+
+
+class RowFilter:
+    """Row predicates that storage backends apply before rows are materialized.
+
+    ``values`` maps a column to the values it may take and ``date_range`` is
+    an inclusive (start, end) pair checked against each dataset's
+    ``period_columns`` (see DATASETS): a single column must fall inside the
+    range, a (start, end) pair of columns must overlap it. Predicates on
+    columns a dataset does not have are ignored, so one filter can be shared
+    by all department datasets.
+    """
+
+    def __init__(self, values=None, date_range=None):
+        # sorted so the same selection in another order gives the same cache key
+        self.values = {col: tuple(sorted(set(vals))) for col, vals in (values or {}).items() if vals}
+        self.date_range = None
+        if date_range is not None:
+            start, end = (pd.Timestamp(d).normalize() for d in date_range)
+            self.date_range = (start, end)
+
+    def key(self):
+        """Hashable representation used in cache keys"""
+        return (tuple(sorted(self.values.items())), self.date_range)
+
+    def is_empty(self):
+        return not self.values and self.date_range is None
+
+    def _period_columns(self, columns, spec):
+        if self.date_range is None or spec is None:
+            return []
+        period = spec.get('period_columns', [])
+        return period if all(c in columns for c in period) else []
+
+    def mask(self, df, spec=None):
+        """Boolean mask selecting the matching rows of df, or None when nothing applies.
+
+        ``spec`` is the dataset's DATASETS entry; date columns still holding
+        raw strings are parsed with its ``date_format``.
+        """
+        mask = None
+        for col, vals in self.values.items():
+            if col not in df.columns:
+                continue
+            cond = df[col].isin(vals)
+            mask = cond if mask is None else mask & cond
+        period = self._period_columns(df.columns, spec)
+        if period:
+            start, end = self.date_range
+            dates = [self._as_dates(df[col], spec) for col in period]
+            cond = (dates[0] <= end) & (dates[-1] >= start)
+            mask = cond if mask is None else mask & cond
+        return mask
+
+    @staticmethod
+    def _as_dates(series, spec):
+        if pd.api.types.is_datetime64_any_dtype(series):
+            return series
+        return pd.to_datetime(series, format=spec['date_format'], errors='coerce')
+
+    def apply(self, df, spec=None):
+        """Return the rows of df matching the filter"""
+        mask = self.mask(df, spec)
+        return df if mask is None else df[mask]
+
+    def to_parquet_filters(self, columns, spec=None):
+        """Return the filter as a pyarrow ``filters`` list, or None when nothing applies"""
+        filters = [(col, 'in', list(vals)) for col, vals in self.values.items() if col in columns]
+        period = self._period_columns(columns, spec)
+        if period:
+            start, end = self.date_range
+            filters.append((period[0], '<=', end))
+            filters.append((period[-1], '>=', start))
+        return filters or None
+
+    def to_sql(self, columns, spec=None):
+        """Return a (WHERE clause, params) pair for a table with the given columns.
+
+        Dates are compared as ISO strings, the format SQLiteStore ingests them in.
+        """
+        clauses, params = [], []
+        for col, vals in self.values.items():
+            if col not in columns:
+                continue
+            clauses.append(f'"{col}" IN ({", ".join("?" * len(vals))})')
+            params.extend(vals)
+        period = self._period_columns(columns, spec)
+        if period:
+            start, end = self.date_range
+            clauses.append(f'"{period[0]}" <= ? AND "{period[-1]}" >= ?')
+            params.extend([end.strftime('%Y-%m-%d'), start.strftime('%Y-%m-%d')])
+        return " AND ".join(clauses), params
+
+
+def default_filter():
+    """The filter the dashboard starts with: every department selected, no status or date filter"""
+    return RowFilter(values={'department': list(DEPARTMENTS)})
+
+
+def stratum_quotas(sizes, n):
+    """Split n rows across groups of the given sizes in proportion (largest remainders first)"""
+    sizes = np.asarray(sizes, dtype='int64')
+    total = sizes.sum()
+    if total <= n:
+        return sizes
+    shares = sizes * n / total
+    quotas = np.floor(shares).astype('int64')
+    extra = n - quotas.sum()
+    if extra:
+        quotas[np.argsort(quotas - shares, kind='stable')[:extra]] += 1
+    return quotas
+
+
+class RowLimit:
+    """Deterministic choice of at most ``n`` rows.
+
+    ``mode`` is one of LIMIT_CONFIG['modes']: 'top' keeps the largest values
+    of the dataset's ``sort_column``, 'head'/'tail' the earliest/latest rows
+    by its first period column, and 'stratified' each department/status
+    group's proportional share, in file order. Backends select rows through
+    an ordering computed once per data version (see ``order``), so applying
+    a limit costs O(n) rather than a copy and shuffle of every row.
+    """
+
+    def __init__(self, n, mode=None):
+        self.n = int(n)
+        self.mode = mode or LIMIT_CONFIG['default_mode']
+        if self.mode not in LIMIT_CONFIG['modes']:
+            raise ValueError(f"Unknown row limit mode: {self.mode}")
+
+    def key(self):
+        """Hashable representation used in cache keys"""
+        return (self.n, self.mode)
+
+    def order_key(self):
+        """Part of key() the precomputed ordering depends on (not n)"""
+        return (self.mode,)
+
+    def columns(self, spec, available=None):
+        """Columns the mode orders or groups by"""
+        if self.mode == 'top':
+            columns = [spec['sort_column']]
+        elif self.mode in ('head', 'tail'):
+            columns = [spec['period_columns'][0]]
+        else:
+            columns = list(LIMIT_CONFIG['strata'])
+        return [c for c in columns if available is None or c in available]
+
+    def order(self, df, spec):
+        """Positions of df's rows in selection order, plus group sizes for 'stratified'"""
+        columns = self.columns(spec, df.columns)
+        if not columns:
+            return np.arange(len(df)), None
+        if self.mode == 'stratified':
+            codes = df.groupby(columns, observed=True, dropna=False, sort=False).ngroup().to_numpy()
+            positions = np.argsort(codes, kind='stable')
+            return positions, np.bincount(codes)
+        keys = df[columns[0]].reset_index(drop=True)
+        ascending = self.mode == 'head'
+        return keys.sort_values(ascending=ascending, kind='stable', na_position='last').index.to_numpy(), None
+
+    def select(self, order):
+        """Positions of the limited rows, from the result of ``order``"""
+        positions, sizes = order
+        if sizes is None:
+            return positions[:self.n]
+        quotas = stratum_quotas(sizes, self.n)
+        starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        chosen = [positions[start:start + quota] for start, quota in zip(starts, quotas) if quota]
+        return np.sort(np.concatenate(chosen)) if chosen else positions[:0]
+
+    def ranking(self, order):
+        """Positions of every row with the limited rows first, from the result of ``order``.
+
+        For 'stratified' these are the chosen rows and then the others, each in
+        file order; the other modes' orderings already start with them.
+        """
+        positions, sizes = order
+        if sizes is None:
+            return positions
+        chosen = self.select(order)
+        rest = np.setdiff1d(np.arange(len(positions)), chosen, assume_unique=True)
+        return np.concatenate((chosen, rest))
+
+    def apply(self, df, spec):
+        """The limited rows of df, in selection order"""
+        return df.iloc[self.select(self.order(df, spec))]
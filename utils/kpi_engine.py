@@ -0,0 +1,147 @@
+import pandas as pd
+
+from config.settings import CACHE_CONFIG
+from utils.data_loader import DatasetCache, _aggregate_frame
+from utils.profiler import profiled
+
+# Every dashboard KPI, declared once per dataset. Metrics are
+# ('count', '*'), ('sum', column), ('mean', column) or
+# ('value_count', column, value) - the number of rows where column == value,
+# read from that column's distribution. Distributions are per-value row counts.
+KPI_DEFINITIONS = {
+    'it_solutions': {
+        'metrics': {
+            'rows': ('count', '*'),
+            'active': ('value_count', 'status', 'Active'),
+            'completed': ('value_count', 'status', 'Completed'),
+            'avg_completion': ('mean', 'completion_percentage'),
+            'total_budget': ('sum', 'budget'),
+        },
+        'distributions': ['status', 'technology'],
+    },
+    'hr_staffing': {
+        'metrics': {
+            'rows': ('count', '*'),
+            'active': ('value_count', 'status', 'Active'),
+            'avg_performance': ('mean', 'performance_score'),
+            'avg_salary': ('mean', 'salary'),
+        },
+        'distributions': ['status', 'department'],
+    },
+    'business_consulting': {
+        'metrics': {
+            'rows': ('count', '*'),
+            'active': ('value_count', 'status', 'Active'),
+            'avg_duration': ('mean', 'duration_months'),
+            'total_value': ('sum', 'project_value'),
+            'avg_satisfaction': ('mean', 'client_satisfaction'),
+        },
+        'distributions': ['status', 'consulting_area'],
+    },
+    'data_ai_services': {
+        'metrics': {
+            'rows': ('count', '*'),
+            'active': ('value_count', 'status', 'Active'),
+            'avg_accuracy': ('mean', 'model_accuracy'),
+            'data_volume': ('sum', 'data_volume_gb'),
+            'automation_savings': ('sum', 'automation_savings'),
+        },
+        'distributions': ['status', 'service_type'],
+    },
+}
+
+# Module level so computed KPIs survive Streamlit reruns
+_kpi_cache = DatasetCache(CACHE_CONFIG['max_entries'])
+# Partials of the latest computed version per source, dataset and filter, extended on appends
+_partials_cache = DatasetCache(CACHE_CONFIG['max_entries'])
+
+
+def _reductions(definition):
+    """Mergeable reductions behind a dataset's metrics; means become a sum and a non-null count"""
+    reductions = {}
+    for name, spec in definition['metrics'].items():
+        if spec[0] == 'mean':
+            reductions[f"{name}__sum"] = ('sum', spec[1])
+            reductions[f"{name}__n"] = ('count', spec[1])
+        elif spec[0] != 'value_count':
+            reductions[name] = spec[:2]
+    return reductions
+
+
+def _add(a, b):
+    """Sum of two partial totals, missing values counting as zero"""
+    return (0 if a is None or pd.isna(a) else a) + (0 if b is None or pd.isna(b) else b)
+
+
+class KPIEngine:
+    """Computes the declared KPIs of a dataset in one pass, cached per data version and filter.
+
+    Metrics are kept as mergeable partials (counts, sums, per-value counts).
+    When the loader can supply just the rows appended since the last
+    computed version, their partials are added to the previous ones instead
+    of recomputing over the whole dataset.
+    """
+
+    def __init__(self, data_loader, cache=None, partials=None):
+        self.data_loader = data_loader
+        self.cache = cache if cache is not None else _kpi_cache
+        self.partials = partials if partials is not None else _partials_cache
+
+    @profiled()
+    def compute(self, dataset, row_filter=None):
+        """Return {'metrics': {name: value}, 'distributions': {column: Series}} for a dataset"""
+        filter_key = row_filter.key() if row_filter is not None else ()
+        version = self.data_loader.source_version(dataset)
+        key = version + ('kpis', dataset, filter_key)
+        result = self.cache.get(key)
+        if result is None:
+            partials = self._update(dataset, row_filter, filter_key, version)
+            result = self._finish(dataset, partials)
+            self.cache.put(key, result)
+        return result
+
+    def seed(self, dataset, version, filter_key, result):
+        """Store a precomputed result, e.g. from a KPI report, for a data version and filter"""
+        self.cache.put(tuple(version) + ('kpis', dataset, filter_key), result)
+
+    def _update(self, dataset, row_filter, filter_key, version):
+        """Partials for the current version, extended from the previous version's when possible"""
+        definition = KPI_DEFINITIONS[dataset]
+        reductions = _reductions(definition)
+        state_key = (version[0], 'partials', dataset, filter_key)
+        state = self.partials.get(state_key)
+        new_rows = None
+        if state is not None:
+            columns = [col for _, col in reductions.values() if col != '*'] + definition['distributions']
+            new_rows = self.data_loader.appended(dataset, state['version'], row_filter, list(dict.fromkeys(columns)))
+        if new_rows is not None:
+            totals = _aggregate_frame(new_rows, reductions).to_dict('records')[0]
+            counts = {col: new_rows[col].value_counts() for col in definition['distributions'] if col in new_rows.columns}
+            partials = (
+                {name: _add(state['partials'][0].get(name), totals.get(name)) for name in reductions},
+                {col: state['partials'][1].get(col, pd.Series(dtype='int64')).add(counts.get(col, pd.Series(dtype='int64')), fill_value=0).astype('int64')
+                 for col in definition['distributions']},
+            )
+        else:
+            partials = self.data_loader.summarize(dataset, reductions, definition['distributions'], row_filter)
+        self.partials.put(state_key, {'version': version, 'partials': partials})
+        return partials
+
+    def _finish(self, dataset, partials):
+        """Metric values and distributions from (totals, counts) partials"""
+        totals, counts = partials
+        distributions = {}
+        for col, values in counts.items():
+            values = values[values > 0]
+            distributions[col] = values.sort_values(ascending=False, kind='stable')
+        metrics = {}
+        for name, spec in KPI_DEFINITIONS[dataset]['metrics'].items():
+            if spec[0] == 'value_count':
+                value = distributions.get(spec[1], pd.Series(dtype='int64')).get(spec[2], 0)
+            elif spec[0] == 'mean':
+                n = totals.get(f"{name}__n", 0)
+                value = totals.get(f"{name}__sum", 0) / n if n and not pd.isna(n) else 0
+            else:
+                value = totals.get(name, 0)
+            metrics[name] = 0 if pd.isna(value) else value
+        return {'metrics': metrics, 'distributions': distributions}
@@ -0,0 +1,130 @@
+import pandas as pd
+
+from config.settings import CACHE_CONFIG, DATASETS
+from utils.data_loader import DatasetCache
+from utils.kpi_engine import KPI_DEFINITIONS
+from utils.profiler import profiled
+
+FREQUENCIES = {'Daily': 'D', 'Weekly': 'W', 'Monthly': 'M'}
+
+# Module level so rollups survive Streamlit reruns; one per source, dataset, frequency and filter
+_rollup_cache = DatasetCache(CACHE_CONFIG['max_entries'])
+
+
+class KPIHistory:
+    """Per-period KPI rollups for the trend sparklines, maintained incrementally.
+
+    Each dataset's rows are bucketed by the first of its ``period_columns``
+    and reduced to mergeable partials per period (counts, sums, and sum/count
+    pairs for means). A partitioned dataset keeps the partials of each
+    partition, so a change re-aggregates only the partitions that were added
+    or changed. A flat file is re-aggregated in full when it changes, unless
+    append-only ingestion (APPEND_CONFIG) reports that it only grew; then
+    just the appended rows are aggregated and added to the stored partials.
+    Trends are read from the partials in O(periods).
+    """
+
+    def __init__(self, data_loader, cache=None):
+        self.data_loader = data_loader
+        self.cache = cache if cache is not None else _rollup_cache
+
+    def _metric_columns(self, dataset):
+        return [spec[1] for spec in KPI_DEFINITIONS[dataset]['metrics'].values() if spec[1] != '*']
+
+    def _partials(self, dataset, df, freq):
+        """Per-period partial aggregates of df, indexed by period"""
+        spec = DATASETS[dataset]
+        period_column = spec['period_columns'][0]
+        periods = df[period_column].dt.to_period(freq)
+        parts = {}
+        for name, metric in KPI_DEFINITIONS[dataset]['metrics'].items():
+            func, col = metric[0], metric[1]
+            if col != '*' and col not in df.columns:
+                continue
+            if func == 'count':
+                parts[name] = pd.Series(1, index=df.index)
+            elif func == 'value_count':
+                parts[name] = (df[col] == metric[2]).astype('int64')
+            elif func == 'sum':
+                parts[name] = df[col].fillna(0)
+            elif func == 'mean':
+                parts[f"{name}__sum"] = df[col].fillna(0)
+                parts[f"{name}__n"] = df[col].notna().astype('int64')
+        frame = pd.DataFrame(parts)
+        frame['period'] = periods
+        return frame.dropna(subset=['period']).groupby('period').sum()
+
+    @profiled()
+    def rollup(self, dataset, freq='M', row_filter=None):
+        """Per-period partials for a dataset, updated incrementally when rows were only appended"""
+        filter_key = row_filter.key() if row_filter is not None else ()
+        version = self.data_loader.source_version(dataset)
+        key = (version[0], 'rollup', dataset, freq, filter_key)
+        state = self.cache.get(key)
+        if state is not None and state['version'] == version:
+            return state['partials']
+
+        spec = DATASETS[dataset]
+        columns = list(dict.fromkeys([spec['period_columns'][0]] + self._metric_columns(dataset)))
+        partitions = self.data_loader._partitions(dataset) if self.data_loader.store is None else None
+        parts = appended = None
+        if partitions is not None:
+            parts = self._partition_partials(dataset, partitions, freq, row_filter, state)
+        elif state is not None:
+            appended = self.data_loader.appended(dataset, state['version'], row_filter, columns)
+        if parts:
+            partials = pd.concat(list(parts.values())).groupby(level=0).sum()
+        elif appended is not None:
+            # append-only ingestion handed over just the new rows
+            partials = state['partials'].add(self._partials(dataset, appended, freq), fill_value=0)
+        else:
+            partials = self._partials(dataset, self.data_loader.load(dataset, row_filter, columns=columns), freq)
+        self.cache.put(key, {'version': version, 'partials': partials, 'parts': parts})
+        return partials
+
+    def _partition_partials(self, dataset, partitions, freq, row_filter, state):
+        """Partials of each partition the filter can match, reusing those of unchanged partitions"""
+        spec = DATASETS[dataset]
+        known = (state or {}).get('parts') or {}
+        parts = {}
+        for entry in partitions.prune(partitions.manifest(), row_filter):
+            part_key = (entry['file'], tuple(entry['signature']))
+            part = known.get(part_key)
+            if part is None:
+                frame = self.data_loader._partition(partitions, entry)
+                part = self._partials(dataset, row_filter.apply(frame, spec) if row_filter is not None else frame, freq)
+            parts[part_key] = part
+        return parts
+
+    def series(self, dataset, metric, freq='M', row_filter=None, cumulative=True, points=12):
+        """Values of a KPI over the last ``points`` periods.
+
+        Cumulative values give the KPI as of the end of each period; otherwise
+        each value covers only the rows dated within that period. ``points=None``
+        returns every period.
+        """
+        partials = self.rollup(dataset, freq, row_filter)
+        if partials.empty:
+            return pd.Series(dtype='float64')
+        full_range = pd.period_range(partials.index.min(), partials.index.max(), freq=partials.index.freq)
+        partials = partials.reindex(full_range, fill_value=0)
+        if cumulative:
+            partials = partials.cumsum()
+        if points is not None:
+            partials = partials.iloc[-points:]
+        if f"{metric}__sum" in partials.columns:
+            values = partials[f"{metric}__sum"] / partials[f"{metric}__n"].where(partials[f"{metric}__n"] > 0)
+        elif metric in partials.columns:
+            values = partials[metric]
+        else:
+            return pd.Series(dtype='float64')
+        return values.astype('float64')
+
+    def total_series(self, datasets, metric, freq='M', row_filter=None, points=12):
+        """Cumulative count/sum KPI added up over several datasets, aligned by period"""
+        trends = [self.series(name, metric, freq, row_filter, points=None) for name in datasets]
+        trends = [t for t in trends if not t.empty]
+        if not trends:
+            return pd.Series(dtype='float64')
+        combined = pd.concat(trends, axis=1).sort_index().ffill().fillna(0)
+        return combined.sum(axis=1).iloc[-points:]
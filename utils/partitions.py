@@ -0,0 +1,198 @@
+import argparse
+import json
+import os
+import threading
+
+import pandas as pd
+
+from config.settings import DATASETS, PARTITION_CONFIG
+from utils.schema import normalize_frame, parse_dates
+
+UNDATED = 'undated'
+
+
+def partition_dir(data_path, dataset):
+    """Directory holding a dataset's partitions (data/it_solutions.csv -> data/it_solutions/)"""
+    return os.path.join(data_path, os.path.splitext(DATASETS[dataset]['file'])[0])
+
+
+def _signature(path):
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _bounds(series):
+    series = series.dropna()
+    if series.empty:
+        return None
+    return [series.min().strftime('%Y-%m-%d'), series.max().strftime('%Y-%m-%d')]
+
+
+class PartitionedDataset:
+    """A dataset stored as a directory of CSV partitions described by a manifest.
+
+    The manifest records each partition's row count, file signature and the
+    min/max of every period column, so a date range can skip partitions that
+    cannot hold matching rows. Entries of partitions that were added or
+    changed are rescanned (that file only) when the manifest is read. The
+    manifest is kept in memory until the directory's mtime changes, so
+    partitions should be added or replaced as whole files (written then
+    renamed into place, as ``split`` does) rather than edited in place.
+    """
+
+    _lock = threading.Lock()
+    _manifests = {}
+
+    def __init__(self, directory, dataset):
+        self.directory = directory
+        self.dataset = dataset
+        self.spec = DATASETS[dataset]
+        self.manifest_path = os.path.join(directory, PARTITION_CONFIG['manifest'])
+
+    @staticmethod
+    def exists(directory):
+        return os.path.isdir(directory)
+
+    @classmethod
+    def open(cls, directory, dataset):
+        """The PartitionedDataset in directory, or None if it is missing or holds no partitions"""
+        if not cls.exists(directory):
+            return None
+        partitions = cls(directory, dataset)
+        return partitions if partitions.manifest() else None
+
+    def _files(self):
+        return sorted(name for name in os.listdir(self.directory) if name.endswith('.csv'))
+
+    def _scan(self, name):
+        path = os.path.join(self.directory, name)
+        signature = _signature(path)
+        df = parse_dates(pd.read_csv(path, usecols=lambda c: c in self.spec['period_columns']), self.spec)
+        return {
+            'file': name,
+            'signature': signature,
+            'rows': len(df),
+            'dated': int(df.notna().all(axis=1).sum()),
+            'bounds': {col: _bounds(df[col]) for col in self.spec['period_columns'] if col in df.columns},
+        }
+
+    def manifest(self):
+        """Manifest entries of the current partitions, refreshing and saving it if files changed"""
+        with self._lock:
+            cached = self._manifests.get(self.directory)
+            if cached is not None and cached[0] == os.stat(self.directory).st_mtime_ns:
+                return cached[1]
+            try:
+                with open(self.manifest_path) as fh:
+                    entries = {entry['file']: entry for entry in json.load(fh)['partitions']}
+            except (OSError, ValueError, KeyError):
+                entries = {}
+            current, changed = [], False
+            for name in self._files():
+                entry = entries.get(name)
+                if entry is None or 'dated' not in entry or entry['signature'] != _signature(os.path.join(self.directory, name)):
+                    entry = self._scan(name)
+                    changed = True
+                current.append(entry)
+            if changed or len(current) != len(entries):
+                tmp = f"{self.manifest_path}.{os.getpid()}.tmp"
+                with open(tmp, 'w') as fh:
+                    json.dump({'dataset': self.dataset, 'partitions': current}, fh, indent=2)
+                os.replace(tmp, self.manifest_path)
+            self._manifests[self.directory] = (os.stat(self.directory).st_mtime_ns, current)
+            return current
+
+    @staticmethod
+    def version(entries):
+        """Hashable signature of the whole dataset"""
+        return tuple((entry['file'], *entry['signature']) for entry in entries)
+
+    def prune(self, entries, row_filter=None):
+        """Entries whose date bounds can overlap the filter's date range"""
+        if row_filter is None or row_filter.date_range is None:
+            return entries
+        period = self.spec['period_columns']
+        start, end = row_filter.date_range
+        kept = []
+        for entry in entries:
+            bounds = entry['bounds']
+            if any(bounds.get(col) is None for col in period):
+                continue  # undated rows never match a date range
+            if pd.Timestamp(bounds[period[0]][0]) <= end and pd.Timestamp(bounds[period[-1]][1]) >= start:
+                kept.append(entry)
+        return kept
+
+    def within(self, entry, row_filter):
+        """True if every row of the partition falls inside the filter's date range"""
+        if entry.get('dated') != entry['rows']:
+            return False  # some rows have no date
+        period = self.spec['period_columns']
+        start, end = row_filter.date_range
+        bounds = entry['bounds']
+        return pd.Timestamp(bounds[period[0]][1]) <= end and pd.Timestamp(bounds[period[-1]][0]) >= start
+
+    def read_partition(self, entry):
+        return normalize_frame(pd.read_csv(os.path.join(self.directory, entry['file'])), self.spec)
+
+
+def concat_partitions(frames, spec):
+    """Concatenate parsed partitions into one normalized frame.
+
+    A column that is entirely missing in a partition (e.g. its blank rows)
+    is given the dtype it has elsewhere first, so it doesn't degrade the
+    combined column to object.
+    """
+    dtypes = {}
+    for frame in frames:
+        for col in frame.columns:
+            if col not in dtypes and frame[col].notna().any():
+                dtypes[col] = frame[col].dtype
+    aligned = []
+    for frame in frames:
+        empty = {col: dtypes[col] for col in frame.columns
+                 if col in dtypes and frame[col].dtype != dtypes[col] and frame[col].isna().all()}
+        aligned.append(frame.astype(empty) if empty else frame)
+    return normalize_frame(pd.concat(aligned, ignore_index=True), spec)
+
+
+def split(source, directory, dataset):
+    """Write a flat CSV as monthly partitions of its first period column, keeping values as written"""
+    spec = DATASETS[dataset]
+    df = pd.read_csv(source, dtype=str, keep_default_na=False)
+    period_column = spec['period_columns'][0]
+    dates = pd.to_datetime(df[period_column], format=spec['date_format'], errors='coerce')
+    months = dates.dt.strftime('%Y-%m').fillna(UNDATED)
+    os.makedirs(directory, exist_ok=True)
+    for month, part in df.groupby(months, sort=True):
+        path = os.path.join(directory, f"{month}.csv")
+        part.to_csv(f"{path}.tmp", index=False)
+        os.replace(f"{path}.tmp", path)
+    return PartitionedDataset(directory, dataset).manifest()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage partitioned department datasets")
+    parser.add_argument('command', choices=['split', 'manifest'],
+                        help="split: write each flat CSV as monthly partitions; manifest: refresh the manifests")
+    parser.add_argument('--data-path', default="data/", help="Directory holding the CSV files")
+    parser.add_argument('--datasets', nargs='+', default=list(DATASETS), help="Datasets to process")
+    args = parser.parse_args(argv)
+
+    for name in args.datasets:
+        directory = partition_dir(args.data_path, name)
+        if args.command == 'split':
+            source = os.path.join(args.data_path, DATASETS[name]['file'])
+            if not os.path.exists(source):
+                print(f"File not found: {source}. Skipping {name}.")
+                continue
+            entries = split(source, directory, name)
+        elif PartitionedDataset.exists(directory):
+            entries = PartitionedDataset(directory, name).manifest()
+        else:
+            print(f"No partitions for {name} in {directory}. Skipping.")
+            continue
+        print(f"{name}: {len(entries)} partitions, {sum(e['rows'] for e in entries)} rows in {directory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import pandas as pd
+
+# Profiler of the rerun executing in the current context (one per Streamlit session thread)
+_active = contextvars.ContextVar('solochoicez_profiler', default=None)
+
+
+class Stage:
+    """A running stage; set ``rows`` before it ends to record the rows it processed"""
+
+    def __init__(self, name):
+        self.name = name
+        self.rows = None
+
+
+class Profiler:
+    """Records wall time, rows processed and net bytes allocated for each stage of a rerun.
+
+    Allocation tracking uses tracemalloc, which slows everything down while
+    it runs, so it is off unless ``track_memory`` is set.
+    """
+
+    def __init__(self, track_memory=False):
+        self.track_memory = track_memory
+        self.records = []
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._started_tracemalloc = False
+        self._token = None
+
+    def __enter__(self):
+        if self.track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._token = _active.set(self)
+        return self
+
+    def __exit__(self, *exc):
+        _active.reset(self._token)
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+        return False
+
+    def record(self, name, started, seconds, rows=None, alloc_bytes=None):
+        with self._lock:
+            self.records.append({
+                'stage': name,
+                'start': started - self._origin,
+                'seconds': seconds,
+                'rows': rows,
+                'alloc_bytes': alloc_bytes,
+                'thread': threading.get_ident(),
+            })
+
+    def breakdown(self):
+        """Per-stage totals, slowest first"""
+        if not self.records:
+            return pd.DataFrame(columns=['stage', 'calls', 'total_ms', 'rows', 'alloc_mib'])
+        df = pd.DataFrame(self.records)
+        known = lambda s: s.sum(min_count=1)  # stays NaN when nothing was measured
+        summary = df.groupby('stage').agg(
+            calls=('seconds', 'size'),
+            total_ms=('seconds', 'sum'),
+            rows=('rows', known),
+            alloc_mib=('alloc_bytes', known),
+        )
+        summary['total_ms'] *= 1000
+        summary['alloc_mib'] /= 2 ** 20
+        return summary.sort_values('total_ms', ascending=False).reset_index()
+
+    def trace(self):
+        """The records as a Chrome trace-event document (chrome://tracing, Perfetto)"""
+        events = [{
+            'name': r['stage'],
+            'ph': 'X',
+            'ts': r['start'] * 1e6,
+            'dur': r['seconds'] * 1e6,
+            'pid': os.getpid(),
+            'tid': r['thread'],
+            'args': {'rows': r['rows'], 'alloc_bytes': r['alloc_bytes']},
+        } for r in self.records]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def trace_json(self):
+        return json.dumps(self.trace())
+
+
+def current_profiler():
+    return _active.get()
+
+
+@contextmanager
+def profile_stage(name):
+    """Time a block under the active profiler; a no-op when profiling is off"""
+    profiler = _active.get()
+    stage = Stage(name)
+    if profiler is None:
+        yield stage
+        return
+    memory = profiler.track_memory and tracemalloc.is_tracing()
+    before = tracemalloc.get_traced_memory()[0] if memory else None
+    started = time.perf_counter()
+    try:
+        yield stage
+    finally:
+        seconds = time.perf_counter() - started
+        alloc = tracemalloc.get_traced_memory()[0] - before if memory else None
+        profiler.record(name, started, seconds, stage.rows, alloc)
+
+
+def _count_rows(result):
+    if isinstance(result, (pd.DataFrame, pd.Series)):
+        return len(result)
+    if isinstance(result, tuple) and result and isinstance(result[0], (pd.DataFrame, pd.Series, dict)):
+        first = result[0]
+        if isinstance(first, dict):
+            return sum(len(v) for v in first.values() if isinstance(v, (pd.DataFrame, pd.Series)))
+        return len(first)
+    return None
+
+
+def profiled(name=None):
+    """Decorator recording each call as a stage named ``name`` (default: Class.method)"""
+    def decorator(func):
+        stage_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _active.get() is None:
+                return func(*args, **kwargs)
+            with profile_stage(stage_name) as stage:
+                result = func(*args, **kwargs)
+                stage.rows = _count_rows(result)
+            return result
+        return wrapper
+    return decorator
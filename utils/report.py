@@ -0,0 +1,163 @@
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from config.settings import DATASETS, REPORT_CONFIG
+from utils.data_loader import DataLoader
+from utils.exports import WRITERS, available_formats, write_csv
+from utils.filters import RowFilter, default_filter
+from utils.kpi_engine import KPIEngine
+
+# (path, mtime_ns) of the report last preloaded into this process
+_preloaded = {}
+
+
+def _json_value(value):
+    if pd.isna(value):
+        return None
+    if hasattr(value, 'item'):
+        value = value.item()
+    return value
+
+
+def build_report(data_loader, row_filter=None):
+    """Compute every dataset's KPIs and distributions with the dashboard's KPI engine"""
+    row_filter = row_filter if row_filter is not None else default_filter()
+    engine = KPIEngine(data_loader)
+    report = {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'backend': 'sqlite' if data_loader.store is not None else 'csv',
+        'filter': {
+            'values': {col: list(vals) for col, vals in row_filter.values.items()},
+            'date_range': [d.date().isoformat() for d in row_filter.date_range] if row_filter.date_range else None,
+        },
+        'datasets': {},
+    }
+    for dataset in DATASETS:
+        try:
+            path, signature = data_loader.source_version(dataset)
+            result = engine.compute(dataset, row_filter)
+        except FileNotFoundError:
+            print(f"File not found for {dataset}. Skipping.")
+            continue
+        report['datasets'][dataset] = {
+            'source': {'path': path, 'mtime_ns': signature[0], 'size': signature[1]},
+            'metrics': {name: _json_value(value) for name, value in result['metrics'].items()},
+            'distributions': {
+                col: {str(k): _json_value(v) for k, v in counts.items()}
+                for col, counts in result['distributions'].items()
+            },
+        }
+    return report
+
+
+def report_frame(report):
+    """The report as one long table: dataset, kind, name, key, value"""
+    rows = []
+    for dataset, entry in report['datasets'].items():
+        for name, value in entry['metrics'].items():
+            rows.append((dataset, 'metric', name, None, value))
+        for col, counts in entry['distributions'].items():
+            for key, value in counts.items():
+                rows.append((dataset, 'distribution', col, key, value))
+    return pd.DataFrame(rows, columns=['dataset', 'kind', 'name', 'key', 'value'])
+
+
+def write_report(report, out_dir=None, data_loader=None, export_formats=()):
+    """Write the JSON report, a Parquet copy when pyarrow is available, and optional data exports"""
+    out_dir = out_dir or REPORT_CONFIG['path']
+    os.makedirs(out_dir, exist_ok=True)
+    json_path = os.path.join(out_dir, REPORT_CONFIG['file'])
+    tmp = json_path + ".tmp"
+    with open(tmp, 'w') as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp, json_path)
+    written = [json_path]
+
+    frame = report_frame(report)
+    if 'parquet' in available_formats(frame):
+        parquet_path = os.path.splitext(json_path)[0] + ".parquet"
+        frame.astype({'value': 'float64'}).to_parquet(parquet_path, index=False)
+        written.append(parquet_path)
+
+    if export_formats and data_loader is not None:
+        f = report['filter']
+        row_filter = RowFilter(f['values'], f['date_range'])
+        for dataset in report['datasets']:
+            df = data_loader.load(dataset, row_filter)
+            for fmt in export_formats:
+                if fmt not in available_formats(df):
+                    print(f"Skipping {fmt} export of {dataset}: writer not installed or too many rows.")
+                    continue
+                path = os.path.join(out_dir, f"{dataset}.{fmt}")
+                with open(path, 'wb') as out:
+                    if fmt == 'csv':
+                        write_csv(df, out)
+                    else:
+                        out.write(WRITERS[fmt](df))
+                written.append(path)
+    return written
+
+
+def preload_report(engine, path=None):
+    """Seed a KPI engine with a report's results whose source files are unchanged.
+
+    Reads the report only when it is new or has changed since the last
+    preload in this process. Returns the number of datasets seeded.
+    """
+    path = path or os.path.join(REPORT_CONFIG['path'], REPORT_CONFIG['file'])
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+    if _preloaded.get(path) == mtime:
+        return 0
+    _preloaded[path] = mtime
+    with open(path) as f:
+        report = json.load(f)
+    filter_key = RowFilter(report['filter']['values'], report['filter']['date_range']).key()
+    seeded = 0
+    for dataset, entry in report['datasets'].items():
+        try:
+            version = engine.data_loader.source_version(dataset)
+        except FileNotFoundError:
+            continue
+        source = entry['source']
+        if version != (source['path'], (source['mtime_ns'], source['size'])):
+            continue
+        result = {
+            'metrics': {k: (0 if v is None else v) for k, v in entry['metrics'].items()},
+            'distributions': {col: pd.Series(counts, dtype='int64') for col, counts in entry['distributions'].items()},
+        }
+        engine.seed(dataset, version, filter_key, result)
+        seeded += 1
+    return seeded
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute the dashboard KPIs without Streamlit and write a report")
+    parser.add_argument('--data-path', default="data/", help="Directory holding the CSV files")
+    parser.add_argument('--out', default=None, help="Output directory (defaults to REPORT_CONFIG['path'])")
+    parser.add_argument('--backend', choices=['csv', 'sqlite'], default=None, help="Storage backend (defaults to DATA_BACKEND)")
+    parser.add_argument('--export', nargs='*', default=[], choices=sorted(WRITERS), help="Also export each filtered dataset in these formats")
+    parser.add_argument('--every', type=float, default=None, help="Recompute every N seconds instead of running once")
+    args = parser.parse_args(argv)
+
+    while True:
+        loader = DataLoader(args.data_path, backend=args.backend)
+        started = time.perf_counter()
+        report = build_report(loader)
+        for path in write_report(report, args.out, loader, args.export):
+            print(f"Wrote {path}")
+        print(f"Report computed in {time.perf_counter() - started:.2f}s")
+        if args.every is None:
+            break
+        time.sleep(args.every)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import pandas as pd
+
+
+def parse_dates(df, spec):
+    """Parse the dataset's date columns (in its ``date_format``) to datetime64"""
+    for col in spec['date_columns']:
+        if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col], format=spec['date_format'], errors='coerce')
+    return df
+
+
+def compact_frame(df, spec):
+    """Downcast the dataset's ``compact_dtypes`` columns; a column whose values don't fit keeps its dtype"""
+    for col, dtype in spec.get('compact_dtypes', {}).items():
+        if col in df.columns and df[col].dtype != dtype:
+            try:
+                df[col] = df[col].astype(dtype)
+            except (TypeError, ValueError, OverflowError):
+                pass
+    return df
+
+
+def normalize_frame(df, spec, categories=True):
+    """Return df with parsed dates, downcast numerics and, if requested, categorical ``category_columns``"""
+    df = parse_dates(df.copy(), spec)
+    if categories:
+        for col in spec.get('category_columns', []):
+            if col in df.columns:
+                df[col] = df[col].astype('category')
+    return compact_frame(df, spec)
@@ -0,0 +1,484 @@
+import argparse
+import base64
+import json
+import os
+import threading
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from config.settings import DATASETS, SKETCH_CONFIG
+from utils.data_loader import DataLoader, DatasetCache
+from utils.partitions import concat_partitions
+from utils.profiler import profiled
+
+# Approximate KPIs, declared per dataset like KPI_DEFINITIONS: ('quantile', column, q)
+# or ('distinct', column) - the number of distinct non-missing values
+SKETCH_KPIS = {
+    'it_solutions': {
+        'distinct_clients': ('distinct', 'client_name'),
+        'median_budget': ('quantile', 'budget', 0.5),
+        'p90_budget': ('quantile', 'budget', 0.9),
+        'median_completion': ('quantile', 'completion_percentage', 0.5),
+    },
+    'hr_staffing': {
+        'median_salary': ('quantile', 'salary', 0.5),
+        'p90_salary': ('quantile', 'salary', 0.9),
+        'p10_performance': ('quantile', 'performance_score', 0.1),
+        'median_performance': ('quantile', 'performance_score', 0.5),
+        'p90_performance': ('quantile', 'performance_score', 0.9),
+    },
+    'business_consulting': {
+        'distinct_clients': ('distinct', 'client_name'),
+        'median_value': ('quantile', 'project_value', 0.5),
+        'p90_value': ('quantile', 'project_value', 0.9),
+        'median_satisfaction': ('quantile', 'client_satisfaction', 0.5),
+    },
+    'data_ai_services': {
+        'distinct_clients': ('distinct', 'client_name'),
+        'median_accuracy': ('quantile', 'model_accuracy', 0.5),
+        'p90_accuracy': ('quantile', 'model_accuracy', 0.9),
+        'median_savings': ('quantile', 'automation_savings', 0.5),
+    },
+}
+
+# Module level so sketches survive Streamlit reruns and are shared by sessions
+_sketch_cache = DatasetCache(SKETCH_CONFIG['cache_entries'])
+
+
+class QuantileSketch:
+    """KLL-style mergeable quantile sketch of a numeric column.
+
+    Values are kept in levels of compactors; an item at level h stands for
+    2**h values. A full level is sorted and every other item moves up a
+    level, so the sketch holds O(k log(n/k)) items and its rank error is
+    about 1/k whatever the number of values. Counts, minimum and maximum
+    are exact.
+    """
+
+    def __init__(self, k=None):
+        self.k = k or SKETCH_CONFIG['quantile_k']
+        self.levels = []
+        self.count = 0
+        self.min = self.max = None
+        self.compactions = 0
+
+    def _capacity(self, level):
+        return max(2, int(np.ceil(self.k * (2 / 3) ** (len(self.levels) - level - 1))))
+
+    def _add(self, level, values):
+        while len(self.levels) <= level:
+            self.levels.append(np.empty(0))
+        self.levels[level] = np.concatenate([self.levels[level], values])
+
+    def _compress(self):
+        while True:
+            full = [h for h, items in enumerate(self.levels) if len(items) > self._capacity(h)]
+            if not full:
+                return
+            level = full[0]
+            items = np.sort(self.levels[level])
+            odd = len(items) % 2
+            # Alternate which half moves up so the error doesn't drift one way
+            self._add(level + 1, items[self.compactions % 2:len(items) - odd:2])
+            self.levels[level] = items[len(items) - odd:]
+            self.compactions += 1
+
+    def update(self, values):
+        """Add an array of values; NaNs are skipped"""
+        values = np.asarray(values, dtype='float64')
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return self
+        self.count += len(values)
+        low, high = float(values.min()), float(values.max())
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+        self._add(0, values)
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """Add another sketch's values to this one"""
+        if not other.count:
+            return self
+        for level, items in enumerate(other.levels):
+            self._add(level, items)
+        self.count += other.count
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        self._compress()
+        return self
+
+    def quantiles(self, qs):
+        """Approximate values at the given quantiles (0..1); NaN for an empty sketch"""
+        qs = np.asarray(qs, dtype='float64')
+        if not self.count:
+            return np.full(len(qs), np.nan)
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2 ** h) for h, items in enumerate(self.levels)])
+        order = np.argsort(values, kind='stable')
+        cumulative = np.cumsum(weights[order])
+        positions = np.searchsorted(cumulative, qs * cumulative[-1], side='left')
+        result = values[order][np.clip(positions, 0, len(values) - 1)]
+        return np.where(qs <= 0, self.min, np.where(qs >= 1, self.max, result))
+
+    def quantile(self, q):
+        return float(self.quantiles([q])[0])
+
+    def to_dict(self):
+        return {'k': self.k, 'count': self.count, 'min': self.min, 'max': self.max,
+                'compactions': self.compactions, 'levels': [items.tolist() for items in self.levels]}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['k'])
+        sketch.count, sketch.min, sketch.max = data['count'], data['min'], data['max']
+        sketch.compactions = data['compactions']
+        sketch.levels = [np.asarray(items, dtype='float64') for items in data['levels']]
+        return sketch
+
+
+def _bit_length(values):
+    """Bit length of each uint64, exact (floats hold the top 53 bits without rounding)"""
+    high = values >> np.uint64(11)
+    _, high_bits = np.frexp(high.astype('float64'))
+    _, low_bits = np.frexp(values.astype('float64'))
+    return np.where(high > 0, high_bits + 11, low_bits)
+
+
+class DistinctSketch:
+    """HyperLogLog distinct count: 2**precision one-byte registers, about 1.04/sqrt(2**precision) relative error.
+
+    Like HLL++'s sparse mode, the 64-bit hashes themselves are also kept
+    while there are at most ``exact_limit`` of them, and counts up to that
+    size are exact. Merging two sketches takes the register-wise maximum
+    (and the union of the hashes), so counts over several partitions or
+    departments combine without double counting.
+    """
+
+    def __init__(self, precision=None, exact_limit=None):
+        self.precision = precision or SKETCH_CONFIG['hll_precision']
+        self.exact_limit = SKETCH_CONFIG['exact_distinct'] if exact_limit is None else exact_limit
+        self.registers = np.zeros(1 << self.precision, dtype='uint8')
+        self.hashes = np.empty(0, dtype='uint64')
+
+    def update(self, values):
+        """Add a Series of values; missing values are skipped"""
+        values = pd.Series(values).dropna()
+        if values.empty:
+            return self
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Hash each category once; same hashes as the plain strings
+            categories = pd.Series(values.cat.categories.astype(str))
+            hashes = pd.util.hash_pandas_object(categories, index=False).to_numpy()[values.cat.codes.to_numpy()]
+        else:
+            hashes = pd.util.hash_pandas_object(values.astype(str), index=False).to_numpy()
+        rest_bits = 64 - self.precision
+        index = (hashes >> np.uint64(rest_bits)).astype(np.intp)
+        rest = hashes & np.uint64((1 << rest_bits) - 1)
+        rank = (rest_bits - _bit_length(rest) + 1).astype('uint8')
+        np.maximum.at(self.registers, index, rank)
+        if self.hashes is not None:
+            self._add_hashes(np.unique(hashes))
+        return self
+
+    def _add_hashes(self, hashes):
+        if self.hashes is None:
+            return
+        self.hashes = np.union1d(self.hashes, hashes)
+        if len(self.hashes) > self.exact_limit:
+            self.hashes = None
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        if other.hashes is None:
+            self.hashes = None
+        else:
+            self._add_hashes(other.hashes)
+        return self
+
+    def estimate(self):
+        if self.hashes is not None:
+            return len(self.hashes)
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.exp2(-self.registers.astype('float64')))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate while many registers are still empty
+            estimate = m * np.log(m / zeros)
+        # more distinct values than exact_limit were seen
+        return max(int(round(estimate)), self.exact_limit + 1)
+
+    def to_dict(self):
+        hashes = base64.b64encode(self.hashes.tobytes()).decode('ascii') if self.hashes is not None else None
+        return {'precision': self.precision, 'registers': base64.b64encode(self.registers.tobytes()).decode('ascii'),
+                'exact_limit': self.exact_limit, 'hashes': hashes}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['precision'], data['exact_limit'])
+        sketch.registers = np.frombuffer(base64.b64decode(data['registers']), dtype='uint8').copy()
+        if data['hashes'] is None:
+            sketch.hashes = None
+        else:
+            sketch.hashes = np.frombuffer(base64.b64decode(data['hashes']), dtype='uint64').copy()
+        return sketch
+
+
+def sketch_columns(dataset):
+    """(quantile columns, distinct columns) a dataset keeps sketches of"""
+    specs = SKETCH_KPIS[dataset].values()
+    quantiles = list(dict.fromkeys(spec[1] for spec in specs if spec[0] == 'quantile'))
+    distinct = list(dict.fromkeys(spec[1] for spec in specs if spec[0] == 'distinct'))
+    return quantiles, distinct
+
+
+def empty_cell(dataset):
+    quantiles, distinct = sketch_columns(dataset)
+    return {'quantiles': {col: QuantileSketch() for col in quantiles},
+            'distinct': {col: DistinctSketch() for col in distinct}}
+
+
+def merge_cell(target, cell):
+    for kind in ('quantiles', 'distinct'):
+        for col, sketch in cell[kind].items():
+            target[kind][col].merge(sketch)
+    return target
+
+
+def build_cells(df, dataset, groups):
+    """Sketches of df's rows per combination of the ``groups`` columns' values"""
+    quantiles, distinct = sketch_columns(dataset)
+    parts = df.groupby(groups, observed=True, dropna=False, sort=False) if groups else [((), df)]
+    cells = {}
+    for key, part in parts:
+        key = key if isinstance(key, tuple) else (key,)
+        key = tuple(None if pd.isna(value) else str(value) for value in key)
+        cell = empty_cell(dataset)
+        for col in quantiles:
+            if col in part.columns:
+                cell['quantiles'][col].update(part[col].to_numpy(dtype='float64', na_value=np.nan))
+        for col in distinct:
+            if col in part.columns:
+                cell['distinct'][col].update(part[col])
+        cells[key] = cell
+    return cells
+
+
+def _encode_cells(cells):
+    return [{'key': list(key),
+             'quantiles': {col: s.to_dict() for col, s in cell['quantiles'].items()},
+             'distinct': {col: s.to_dict() for col, s in cell['distinct'].items()}}
+            for key, cell in cells.items()]
+
+
+def _decode_cells(entries):
+    return {tuple(entry['key']): {
+        'quantiles': {col: QuantileSketch.from_dict(s) for col, s in entry['quantiles'].items()},
+        'distinct': {col: DistinctSketch.from_dict(s) for col, s in entry['distinct'].items()},
+    } for entry in entries}
+
+
+class SketchStore:
+    """Approximate quantiles and distinct counts of each dataset, kept as mergeable sketches.
+
+    Sketches are built per source part (the dataset's file, or each of its
+    partitions) and per department/status cell (SKETCH_CONFIG['groups']),
+    and saved in SKETCH_CONFIG['directory'] of the loader's data directory
+    with the part's path and signature. A changed
+    part is rebuilt, or extended with just its appended rows when
+    append-only ingestion tracks it. A query merges the cells the sidebar
+    filter selects, so its cost depends on the number of cells, not rows.
+    A date range on a partitioned dataset merges the cells of the partitions
+    inside it and sketches only the rows of partitions crossing its edges;
+    on a flat file, and for filters on other columns, the filtered rows are
+    sketched instead.
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, data_loader, path=None, cache=None):
+        self.data_loader = data_loader
+        self.path = path or os.path.join(data_loader.data_path, SKETCH_CONFIG['directory'])
+        self.cache = cache if cache is not None else _sketch_cache
+
+    def sketch_path(self, dataset):
+        return os.path.join(self.path, f"{dataset}.json")
+
+    @staticmethod
+    def _config(dataset):
+        """What stored sketches must have been built with to be reused"""
+        return {'quantile_k': SKETCH_CONFIG['quantile_k'], 'hll_precision': SKETCH_CONFIG['hll_precision'],
+                'exact_distinct': SKETCH_CONFIG['exact_distinct'], 'groups': SKETCH_CONFIG['groups'],
+                'columns': sketch_columns(dataset)}
+
+    def _parts(self, dataset):
+        """(name, path, signature, read) of each source part of a dataset"""
+        quantiles, distinct = sketch_columns(dataset)
+        columns = list(dict.fromkeys(SKETCH_CONFIG['groups'] + quantiles + distinct))
+        partitions = self.data_loader._partitions(dataset) if self.data_loader.store is None else None
+        if partitions is not None:
+            return [(entry['file'], os.path.join(partitions.directory, entry['file']), list(entry['signature']),
+                     partial(partitions.read_partition, entry)) for entry in partitions.manifest()]
+        path, signature = self.data_loader.source_version(dataset)
+        return [(os.path.basename(path), path, list(signature), partial(self.data_loader.load, dataset, columns=columns))]
+
+    def _read(self, dataset):
+        """The dataset's saved sketch document, or {} if missing or built with other settings"""
+        try:
+            with open(self.sketch_path(dataset)) as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if stored.get('config') != json.loads(json.dumps(self._config(dataset))):
+            return {}
+        return stored
+
+    def _write(self, dataset, groups, parts):
+        os.makedirs(self.path, exist_ok=True)
+        target = self.sketch_path(dataset)
+        tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        document = {'dataset': dataset, 'config': self._config(dataset), 'groups': groups,
+                    'parts': {name: {'path': part['path'], 'signature': part['signature'], 'cells': _encode_cells(part['cells'])}
+                              for name, part in parts.items()}}
+        with open(tmp, 'w') as f:
+            json.dump(document, f)
+        os.replace(tmp, target)
+
+    def _state(self, dataset):
+        """{'groups', 'cells', 'parts'} for the dataset's current version: the cells merged over its parts, and each part's cells"""
+        key = self.data_loader.source_version(dataset) + ('sketches', dataset)
+        result = self.cache.get(key)
+        if result is None:
+            with self._lock:
+                result = self._build(dataset)
+            self.cache.put(key, result)
+        return result
+
+    def cells(self, dataset):
+        """(group columns, {cell key: sketches}) for the dataset's current version, merged over its parts"""
+        state = self._state(dataset)
+        return state['groups'], state['cells']
+
+    def _build(self, dataset):
+        stored = self._read(dataset)
+        stored_parts = stored.get('parts', {})
+        groups = stored.get('groups')
+        parts, changed = {}, False
+        for name, path, signature, read in self._parts(dataset):
+            entry = stored_parts.get(name)
+            if entry is not None and entry['path'] != path:
+                entry = None
+            if entry is not None and entry['signature'] == signature:
+                parts[name] = {'path': path, 'signature': signature, 'cells': _decode_cells(entry['cells'])}
+                continue
+            changed = True
+            new_rows = None
+            if entry is not None:
+                new_rows = self.data_loader.appended(dataset, (path, tuple(entry['signature'])))
+            if new_rows is not None:
+                cells = _decode_cells(entry['cells'])
+                for cell_key, cell in build_cells(new_rows, dataset, groups).items():
+                    merge_cell(cells.setdefault(cell_key, empty_cell(dataset)), cell)
+            else:
+                df = read()
+                if groups is None:
+                    groups = [c for c in SKETCH_CONFIG['groups'] if c in df.columns]
+                cells = build_cells(df, dataset, groups)
+            parts[name] = {'path': path, 'signature': signature, 'cells': cells}
+        groups = groups or []
+        if changed or set(parts) != set(stored_parts):
+            self._write(dataset, groups, parts)
+        merged = {}
+        for part in parts.values():
+            for cell_key, cell in part['cells'].items():
+                merge_cell(merged.setdefault(cell_key, empty_cell(dataset)), cell)
+        return {'groups': groups, 'cells': merged, 'parts': {name: part['cells'] for name, part in parts.items()}}
+
+    @staticmethod
+    def _select(dataset, groups, cells, row_filter=None):
+        """The cells matching row_filter's department/status values, merged into one"""
+        wanted = [(i, row_filter.values[col]) for i, col in enumerate(groups)
+                  if row_filter is not None and col in row_filter.values]
+        merged = empty_cell(dataset)
+        for cell_key, cell in cells.items():
+            if all(cell_key[i] in values for i, values in wanted):
+                merge_cell(merged, cell)
+        return merged
+
+    def _scan(self, dataset, row_filter):
+        """Sketch of the filtered rows, read through the loader"""
+        quantiles, distinct = sketch_columns(dataset)
+        df = self.data_loader.load(dataset, row_filter, columns=quantiles + distinct)
+        return build_cells(df, dataset, []).get((), empty_cell(dataset))
+
+    def _query_partitions(self, dataset, partitions, row_filter):
+        """Date range query of a partitioned dataset: the saved cells of partitions inside the range,
+           plus a sketch of the matching rows of partitions crossing its edges"""
+        state = self._state(dataset)
+        spec = DATASETS[dataset]
+        merged = empty_cell(dataset)
+        edges = []
+        for entry in partitions.prune(partitions.manifest(), row_filter):
+            if partitions.within(entry, row_filter) and entry['file'] in state['parts']:
+                merge_cell(merged, self._select(dataset, state['groups'], state['parts'][entry['file']], row_filter))
+            else:
+                edges.append(row_filter.apply(partitions.read_partition(entry), spec))
+        if edges:
+            df = concat_partitions(edges, spec)
+            merge_cell(merged, build_cells(df, dataset, []).get((), empty_cell(dataset)))
+        return merged
+
+    def query(self, dataset, row_filter=None):
+        """Sketches of the dataset's rows matching row_filter, merged into one cell"""
+        if row_filter is not None and any(col not in SKETCH_CONFIG['groups'] for col in row_filter.values):
+            return self._scan(dataset, row_filter)
+        if row_filter is not None and row_filter.date_range is not None:
+            partitions = self.data_loader._partitions(dataset) if self.data_loader.store is None else None
+            if partitions is None:
+                # Cells hold no dates, so a flat file (or the SQLite table) is scanned for a date range
+                return self._scan(dataset, row_filter)
+            return self._query_partitions(dataset, partitions, row_filter)
+        groups, cells = self.cells(dataset)
+        return self._select(dataset, groups, cells, row_filter)
+
+    @profiled()
+    def compute(self, dataset, row_filter=None):
+        """Return {'metrics': {name: value}} for the dataset's SKETCH_KPIS"""
+        filter_key = row_filter.key() if row_filter is not None else ()
+        key = self.data_loader.source_version(dataset) + ('sketch_kpis', dataset, filter_key)
+        result = self.cache.get(key)
+        if result is None:
+            cell = self.query(dataset, row_filter)
+            metrics = {}
+            for name, spec in SKETCH_KPIS[dataset].items():
+                if spec[0] == 'distinct':
+                    metrics[name] = cell['distinct'][spec[1]].estimate()
+                else:
+                    metrics[name] = cell['quantiles'][spec[1]].quantile(spec[2])
+            result = {'metrics': metrics}
+            self.cache.put(key, result)
+        return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the quantile and distinct-count sketches of the department datasets")
+    parser.add_argument('--data-path', default="data/", help="Directory holding the CSV files or partition directories")
+    parser.add_argument('--out', default=None, help="Sketch directory (defaults to SKETCH_CONFIG['directory'] inside --data-path)")
+    args = parser.parse_args(argv)
+
+    store = SketchStore(DataLoader(args.data_path), args.out)
+    for name in DATASETS:
+        try:
+            groups, cells = store.cells(name)
+        except FileNotFoundError:
+            print(f"Data not found for {name}. Skipping.")
+            continue
+        print(f"{name}: {len(cells)} cells by {', '.join(groups) or 'nothing'} -> {store.sketch_path(name)}")
+
+
+if __name__ == "__main__":
+    main()
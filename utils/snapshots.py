@@ -0,0 +1,112 @@
+import argparse
+import os
+import threading
+
+import pandas as pd
+
+from config.settings import CSV_CHUNKSIZE, DATASETS, SNAPSHOT_CONFIG
+from utils.schema import compact_frame, parse_dates
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # snapshots are optional; DataLoader falls back to the CSVs
+    pa = pq = None
+
+SOURCE_KEY = b'solochoicez.source'
+
+
+class SnapshotStore:
+    """Parquet snapshots of the department CSVs with typed dates and categorical columns.
+
+    Snapshots live in a directory inside the data directory they were built
+    from. Each records the path and mtime/size of its CSV and is rebuilt when
+    either differs. Reads are memory-mapped and limited to the requested
+    columns and matching row groups.
+    """
+
+    def __init__(self, path=None, data_path="data/"):
+        self.path = path or os.path.join(data_path, SNAPSHOT_CONFIG['directory'])
+
+    @staticmethod
+    def available():
+        return pq is not None
+
+    def snapshot_path(self, dataset):
+        return os.path.join(self.path, f"{dataset}.parquet")
+
+    def is_fresh(self, dataset, source_path, signature):
+        path = self.snapshot_path(dataset)
+        if not os.path.exists(path):
+            return False
+        metadata = pq.read_schema(path).metadata or {}
+        return metadata.get(SOURCE_KEY) == self._source_tag(source_path, signature)
+
+    @staticmethod
+    def _source_tag(source_path, signature):
+        return f"{os.path.abspath(source_path)}:{signature[0]}:{signature[1]}".encode()
+
+    def build(self, dataset, source_path, signature):
+        """Convert a CSV into its snapshot, chunk by chunk"""
+        spec = DATASETS[dataset]
+        os.makedirs(self.path, exist_ok=True)
+        target = self.snapshot_path(dataset)
+        # Unique per thread so concurrent loads of one dataset don't share a temp file
+        tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        writer = None
+        try:
+            for chunk in pd.read_csv(source_path, chunksize=CSV_CHUNKSIZE):
+                chunk = parse_dates(chunk, spec)
+                if writer is None:
+                    schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+                    schema = schema.with_metadata({**(schema.metadata or {}), SOURCE_KEY: self._source_tag(source_path, signature)})
+                    writer = pq.ParquetWriter(tmp, schema)
+                else:
+                    # Later chunks may gain NaNs in integer columns; keep the first chunk's types
+                    for field in schema:
+                        if pa.types.is_integer(field.type) and not pd.api.types.is_integer_dtype(chunk[field.name]):
+                            chunk[field.name] = chunk[field.name].astype('Int64')
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+        finally:
+            if writer is not None:
+                writer.close()
+        if writer is None:
+            return
+        os.replace(tmp, target)
+
+    def read(self, dataset, source_path, signature, columns=None, row_filter=None):
+        """Read a dataset from its snapshot, (re)building it first if it is missing or stale"""
+        if not self.is_fresh(dataset, source_path, signature):
+            self.build(dataset, source_path, signature)
+        spec = DATASETS[dataset]
+        path = self.snapshot_path(dataset)
+        names = pq.read_schema(path).names
+        if columns:
+            columns = [c for c in columns if c in names]
+        filters = row_filter.to_parquet_filters(names, spec) if row_filter is not None else None
+        categories = [c for c in spec.get('category_columns', []) if c in names and (not columns or c in columns)]
+        table = pq.read_table(path, columns=columns, filters=filters, memory_map=True, read_dictionary=categories)
+        return compact_frame(table.to_pandas(), spec)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build Parquet snapshots of the department CSVs")
+    parser.add_argument('--data-path', default="data/", help="Directory holding the CSV files")
+    parser.add_argument('--out', default=None, help="Snapshot directory (defaults to SNAPSHOT_CONFIG['directory'] inside --data-path)")
+    args = parser.parse_args(argv)
+
+    if not SnapshotStore.available():
+        parser.error("pyarrow is required to build snapshots")
+    store = SnapshotStore(args.out, args.data_path)
+    for name, spec in DATASETS.items():
+        source = os.path.join(args.data_path, spec['file'])
+        if not os.path.exists(source):
+            print(f"File not found: {source}. Skipping {name}.")
+            continue
+        stat = os.stat(source)
+        store.build(name, source, (stat.st_mtime_ns, stat.st_size))
+        print(f"{name}: {store.snapshot_path(name)}")
+
+
+if __name__ == "__main__":
+    main()
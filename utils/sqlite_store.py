@@ -0,0 +1,241 @@
+import argparse
+import os
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+
+from config.settings import DATABASE_CONFIG, DATASETS
+from utils.filters import RowLimit, stratum_quotas
+from utils.partitions import PartitionedDataset, partition_dir
+from utils.schema import normalize_frame
+
+SQL_FUNCTIONS = {'count': 'COUNT', 'sum': 'SUM', 'mean': 'AVG', 'min': 'MIN', 'max': 'MAX'}
+INDEXED_COLUMNS = ['status', 'department']
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _sql_type(dtype):
+    if pd.api.types.is_integer_dtype(dtype) or pd.api.types.is_bool_dtype(dtype):
+        return 'INTEGER'
+    if pd.api.types.is_float_dtype(dtype):
+        return 'REAL'
+    return 'TEXT'
+
+
+def normalize_dates(df, spec):
+    """Rewrite the dataset's date columns as ISO strings so they sort and compare in SQL"""
+    for col in spec['date_columns']:
+        if col in df.columns:
+            parsed = pd.to_datetime(df[col], format=spec['date_format'], errors='coerce')
+            df[col] = parsed.dt.strftime('%Y-%m-%d')
+    return df
+
+
+class SQLiteStore:
+    """SQLite storage tier for the department datasets, configured by DATABASE_CONFIG"""
+
+    def __init__(self, path=None):
+        self.path = path or DATABASE_CONFIG['path']
+        self._columns = {}
+
+    def connect(self):
+        return sqlite3.connect(self.path)
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def ingest(self, data_path="data/", chunksize=100000):
+        """Load the department CSVs into typed, indexed tables. Returns row counts per table."""
+        counts = {}
+        with closing(self.connect()) as conn:
+            for name, spec in DATASETS.items():
+                csv_path = os.path.join(data_path, spec['file'])
+                partitions = PartitionedDataset.open(partition_dir(data_path, name), name)
+                if partitions is not None:
+                    sources = [os.path.join(partitions.directory, entry['file']) for entry in partitions.manifest()]
+                elif os.path.exists(csv_path):
+                    sources = [csv_path]
+                else:
+                    print(f"File not found: {csv_path}. Skipping {name}.")
+                    continue
+                conn.execute(f"DROP TABLE IF EXISTS {_quote(name)}")
+                rows = 0
+                chunks = (chunk for source in sources for chunk in pd.read_csv(source, chunksize=chunksize))
+                for chunk in chunks:
+                    chunk = normalize_dates(chunk, spec)
+                    if rows == 0:
+                        schema = ", ".join(f"{_quote(col)} {_sql_type(dtype)}" for col, dtype in chunk.dtypes.items())
+                        conn.execute(f"CREATE TABLE {_quote(name)} ({schema})")
+                    chunk.to_sql(name, conn, if_exists='append', index=False)
+                    rows += len(chunk)
+                columns = self._table_columns(conn, name)
+                for col in INDEXED_COLUMNS + spec['date_columns']:
+                    if col in columns:
+                        conn.execute(f"CREATE INDEX {_quote(f'idx_{name}_{col}')} ON {_quote(name)} ({_quote(col)})")
+                conn.commit()
+                counts[name] = rows
+        self._columns.clear()
+        return counts
+
+    def _table_columns(self, conn, table):
+        """Column name -> declared SQL type"""
+        if table not in self._columns:
+            info = conn.execute(f"PRAGMA table_info({_quote(table)})").fetchall()
+            self._columns[table] = {row[1]: row[2] for row in info}
+        return self._columns[table]
+
+    def _where(self, conn, table, row_filter):
+        if row_filter is None:
+            return "", []
+        clause, params = row_filter.to_sql(self._table_columns(conn, table), DATASETS.get(table))
+        return (f" WHERE {clause}" if clause else ""), params
+
+    def query(self, table, columns=None, row_filter=None, limit=None):
+        """Return the matching rows of a table as a DataFrame.
+
+        ``limit`` is a row count or a RowLimit; its orderings use the indexes
+        built at ingest, and 'stratified' numbers the rows of each group with
+        ROW_NUMBER() to keep each group's quota.
+        """
+        with closing(self.connect()) as conn:
+            available = self._table_columns(conn, table)
+            if columns:
+                select = ", ".join(_quote(c) for c in columns if c in available)
+            else:
+                select = "*"
+            where, params = self._where(conn, table, row_filter)
+            sql = f"SELECT {select} FROM {_quote(table)}{where}"
+            if isinstance(limit, RowLimit):
+                spec = DATASETS[table]
+                keys = limit.columns(spec, available)
+                if limit.mode == 'stratified' and keys:
+                    sql, params = self._stratified(conn, table, select, where, params, keys, limit.n)
+                else:
+                    order = "rowid"
+                    if keys:
+                        direction = 'ASC' if limit.mode == 'head' else 'DESC'
+                        order = f"{_quote(keys[0])} IS NULL, {_quote(keys[0])} {direction}, rowid"
+                    sql += f" ORDER BY {order} LIMIT ?"
+                    params = params + [limit.n]
+            elif limit is not None:
+                sql += " LIMIT ?"
+                params = params + [int(limit)]
+            df = pd.read_sql_query(sql, conn, params=params)
+            if isinstance(limit, RowLimit) and limit.mode == 'stratified':
+                df = df.drop(columns=[c for c in df.columns if c.startswith('_limit_')])
+        spec = dict(DATASETS[table], date_format='%Y-%m-%d')
+        return normalize_frame(df, spec)
+
+    def _ranked(self, conn, table, select, where, params, strata, n):
+        """Rows numbered within each strata group, and the condition picking each group's share of n rows.
+
+        Returns (ranked SQL, condition, condition params); the ranked rows carry
+        their table order as _limit_rowid.
+        """
+        partition = ", ".join(_quote(c) for c in strata)
+        groups = conn.execute(
+            f"SELECT {partition}, COUNT(*) FROM {_quote(table)}{where} GROUP BY {partition} ORDER BY MIN(rowid)", params
+        ).fetchall()
+        quotas = stratum_quotas([row[-1] for row in groups], n)
+        aliases = [_quote('_limit_' + c) for c in strata]
+        copies = ", ".join(f"{_quote(c)} AS {alias}" for c, alias in zip(strata, aliases))
+        ranked = (f"SELECT {select}, {copies}, rowid AS _limit_rowid, "
+                  f"ROW_NUMBER() OVER (PARTITION BY {partition} ORDER BY rowid) AS _limit_rank FROM {_quote(table)}{where}")
+        match = "(" + " AND ".join(f"{alias} IS ?" for alias in aliases) + " AND _limit_rank <= ?)"
+        conditions, quota_params = [], []
+        for row, quota in zip(groups, quotas):
+            if quota:
+                conditions.append(match)
+                quota_params.extend(list(row[:-1]) + [int(quota)])
+        return ranked, f"({' OR '.join(conditions) or '0'})", quota_params
+
+    def _stratified(self, conn, table, select, where, params, strata, n):
+        """SQL and parameters keeping each strata group's share of n rows, in table order"""
+        ranked, picked, quota_params = self._ranked(conn, table, select, where, params, strata, n)
+        sql = f"SELECT * FROM ({ranked}) WHERE {picked} ORDER BY _limit_rowid"
+        return sql, params + quota_params
+
+    def aggregate(self, table, aggregates, group_by=None, row_filter=None):
+        """Compute aggregates in SQL.
+
+        ``aggregates`` maps an output name to a (function, column) pair, with
+        function one of count/sum/mean/min/max and column '*' for row counts.
+        """
+        with closing(self.connect()) as conn:
+            available = self._table_columns(conn, table)
+            if group_by is not None and group_by not in available:
+                return pd.DataFrame(columns=[group_by] + list(aggregates))
+            select = []
+            for alias, (func, col) in aggregates.items():
+                if col != '*' and col not in available:
+                    continue
+                target = '*' if col == '*' else _quote(col)
+                select.append(f"{SQL_FUNCTIONS[func]}({target}) AS {_quote(alias)}")
+            if group_by is not None:
+                select.insert(0, _quote(group_by))
+            where, params = self._where(conn, table, row_filter)
+            sql = f"SELECT {', '.join(select)} FROM {_quote(table)}{where}"
+            if group_by is not None:
+                sql += f" GROUP BY {_quote(group_by)} ORDER BY 2 DESC"
+            return pd.read_sql_query(sql, conn, params=params)
+
+
+    def page(self, table, row_filter=None, sort_by=None, ascending=True, search=None, offset=0, limit=100, row_limit=None):
+        """Return (rows, total) for one sorted page of the matching rows.
+
+        ``search`` keeps rows where any text column contains it (case-insensitive).
+        Date columns are stored as ISO text but not searched, as in row_order,
+        which searches string and categorical columns only. Without ``sort_by``,
+        a RowLimit ``row_limit`` orders the rows so that its limited rows come first.
+        """
+        with closing(self.connect()) as conn:
+            columns = self._table_columns(conn, table)
+            where, params = self._where(conn, table, row_filter)
+            source, order, order_params = _quote(table), "rowid", []
+            if sort_by in columns:
+                order = f"{_quote(sort_by)} IS NULL, {_quote(sort_by)} {'ASC' if ascending else 'DESC'}, rowid"
+            elif row_limit is not None:
+                keys = row_limit.columns(DATASETS[table], columns)
+                if row_limit.mode == 'stratified' and keys:
+                    # rank over the filtered rows before searching, like the in-memory ordering
+                    ranked, picked, order_params = self._ranked(conn, table, "*", where, params, keys, row_limit.n)
+                    source, where = f"({ranked})", ""
+                    order = f"CASE WHEN {picked} THEN 0 ELSE 1 END, _limit_rowid"
+                elif keys:
+                    direction = 'ASC' if row_limit.mode == 'head' else 'DESC'
+                    order = f"{_quote(keys[0])} IS NULL, {_quote(keys[0])} {direction}, rowid"
+            if search:
+                dates = DATASETS[table]['date_columns']
+                text_columns = [c for c, kind in columns.items() if kind == 'TEXT' and c not in dates]
+                pattern = "%" + search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+                clause = " OR ".join(f"{_quote(c)} LIKE ? ESCAPE '\\'" for c in text_columns) or "0"
+                where = f"{where} AND ({clause})" if where else f" WHERE ({clause})"
+                params = params + [pattern] * len(text_columns)
+            total = conn.execute(f"SELECT COUNT(*) FROM {source}{where}", params).fetchone()[0]
+            sql = f"SELECT * FROM {source}{where} ORDER BY {order} LIMIT ? OFFSET ?"
+            df = pd.read_sql_query(sql, conn, params=params + order_params + [int(limit), int(offset)])
+            df = df.drop(columns=[c for c in df.columns if c.startswith('_limit_')])
+        spec = dict(DATASETS[table], date_format='%Y-%m-%d')
+        return normalize_frame(df, spec), total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the Solochoicez SQLite data store")
+    sub = parser.add_subparsers(dest='command', required=True)
+    ingest = sub.add_parser('ingest', help="Load the department CSVs into the database")
+    ingest.add_argument('--data-path', default="data/", help="Directory holding the CSV files")
+    ingest.add_argument('--db', default=None, help="Database path (defaults to DATABASE_CONFIG['path'])")
+    args = parser.parse_args(argv)
+
+    if args.command == 'ingest':
+        store = SQLiteStore(args.db)
+        for table, rows in store.ingest(args.data_path).items():
+            print(f"{table}: {rows} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import pandas as pd
+
+from config.settings import STARTUP_CONFIG
+
+# Process-wide; the first measurement of a stage is the cold one, later reruns are ignored
+_timings = OrderedDict()
+_lock = threading.Lock()
+_prewarm = {}
+
+
+def mark(stage, seconds):
+    """Record how long a startup stage took, unless it was already recorded in this process"""
+    with _lock:
+        _timings.setdefault(stage, seconds)
+
+
+@contextmanager
+def timed(stage):
+    """Record the duration of the enclosed block as a startup stage"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        mark(stage, time.perf_counter() - start)
+
+
+def startup_timings():
+    """The recorded stages (stage, ms) in the order they completed"""
+    with _lock:
+        items = list(_timings.items())
+    return pd.DataFrame([(stage, seconds * 1000) for stage, seconds in items], columns=['stage', 'ms'])
+
+
+def summary():
+    """One-line form of startup_timings() for logs and captions"""
+    return ", ".join(f"{stage} {ms:.0f} ms" for stage, ms in startup_timings().itertuples(index=False))
+
+
+def prewarm(make_tasks):
+    """Run the tasks (callables) ``make_tasks()`` returns in a background thread to fill the process-wide caches.
+
+    Only the first call in a process calls ``make_tasks``, in the caller's
+    thread, and starts the thread; the others just return it. Tasks whose
+    data is missing are skipped. Once done, the 'prewarm' stage is recorded
+    and the startup timings are printed.
+    """
+    if not STARTUP_CONFIG['prewarm']:
+        return None
+    with _lock:
+        if 'thread' in _prewarm:
+            return _prewarm['thread']
+        thread = threading.Thread(target=_run, args=(list(make_tasks()),), name="prewarm", daemon=True)
+        _prewarm['thread'] = thread
+    thread.start()
+    return thread
+
+
+def _run(tasks):
+    with timed('prewarm'):
+        for task in tasks:
+            try:
+                task()
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                print(f"Pre-warm task failed: {e}")
+    print(f"Startup: {summary()}")
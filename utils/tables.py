@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+
+from config.settings import STATUS_COLORS, TABLE_CONFIG
+
+
+def style_status_rows(df):
+    """Return a pandas Styler with conditional row background based on 'status' column.
+
+    Colours are looked up once per status category rather than once per row.
+    If 'status' is not present, df is empty or longer than
+    TABLE_CONFIG['style_max_rows'], or styling fails, df is returned as-is.
+    """
+    if df is None or df.empty or 'status' not in df.columns:
+        return df
+    if len(df) > TABLE_CONFIG['style_max_rows']:
+        return df
+    status = df['status'].astype('category')
+    # Code -1 (missing status) picks the trailing 'white' entry
+    palette = np.array([f"background-color: {STATUS_COLORS.get(c, 'white')}" for c in status.cat.categories] + ['background-color: white'])
+    row_css = palette[status.cat.codes.to_numpy()]
+    styles = pd.DataFrame(np.repeat(row_css[:, None], df.shape[1], axis=1), index=df.index, columns=df.columns)
+    try:
+        return df.style.apply(lambda _: styles, axis=None)
+    except Exception:
+        # If styler fails for any reason, return raw df
+        return df